@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the scraper against the offline mock servers
+Runs process_names (sync and async) and process_profiles (per-user and
+batched) on a names.txt-sized input and reports names/sec, p50/p99 time
+per stage and request counts. Needs no credentials and spends no quota.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+from metrics import percentile
+from mock_servers import FIRST_NAMES, LAST_NAMES, FakeGrokClient, MockConfig, MockServer
+
+MODES = ['sync', 'async', 'profiles', 'profiles-batched']
+
+
+class StageTimer:
+    """Collects wall-clock durations per stage from wrapped functions"""
+
+    def __init__(self):
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+
+    def wrap(self, stage: str, func: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.durations[stage].append(time.perf_counter() - start)
+        return timed
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {'count': len(values), 'p50': percentile(values, 50), 'p99': percentile(values, 99),
+                    'total': sum(values)}
+            for stage, values in sorted(self.durations.items())
+        }
+
+
+def write_names(path: str, count: int):
+    """names.txt-shaped input with count distinct names"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('Name,Title\n')
+        for i in range(count):
+            first = FIRST_NAMES[i % len(FIRST_NAMES)]
+            last = LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]
+            suffix = i // (len(FIRST_NAMES) * len(LAST_NAMES))
+            f.write(f'{first} {last}{suffix if suffix else ""},\n')
+
+
+def strip_profile_images(path: str):
+    """
+    Drop the profile_image_url a names run keeps from the search, so the
+    profile modes have to look every image up instead of finishing with 0 requests
+    """
+    with open(path, encoding='utf-8') as f:
+        results = json.load(f)
+    for result in results:
+        result.pop('profile_image_url', None)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+def run_mode(mode: str, server: MockServer, args) -> Dict:
+    import main
+    import fetch_profile_pics
+    import journal
+    import memo
+    import rate_limiter
+    import x_client
+
+    # Fresh per-run state: client, limiter, memo, Grok client
+    rate_limiter.LIMITER.__init__()
+    x_client._client = None
+    main.TWEET_MEMO = memo.SingleFlightLRU(main.TWEET_MEMO_SIZE)
+    main._grok_client = FakeGrokClient(server.url)
+    main.GROK_LIMITER.__init__(main.GROK_INITIAL_CONCURRENCY, maximum=main.GROK_CONCURRENCY, name='grok')
+
+    timer = StageTimer()
+    originals = {}
+
+    def patch(module, attr: str, stage: str):
+        originals[(module, attr)] = getattr(module, attr)
+        setattr(module, attr, timer.wrap(stage, getattr(module, attr)))
+
+    patch(main, 'search_x_users', 'search')
+    patch(main, 'get_user_tweets', 'tweets')
+    patch(main, 'grok_match_user', 'grok')
+    patch(main, 'grok_match_batch', 'grok_batch')
+    patch(fetch_profile_pics, 'fetch_user_profile_pic', 'profile_lookup')
+    patch(fetch_profile_pics, 'fetch_profile_pics_batch', 'profile_lookup_batch')
+    patch(journal.Journal, 'append', 'save')
+
+    requests_before = dict(server.state.requests)
+    injected_before = server.state.injected_429s
+    output = io.StringIO()
+    start = time.perf_counter()
+
+    try:
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else output):
+            if mode == 'sync':
+                main.process_names()
+            elif mode == 'async':
+                main.process_names_async()
+            elif mode == 'profiles':
+                fetch_profile_pics.process_profiles()
+            else:
+                fetch_profile_pics.process_profiles_batched()
+    finally:
+        elapsed = time.perf_counter() - start
+        for (module, attr), original in originals.items():
+            setattr(module, attr, original)
+
+    if mode.startswith('profiles'):
+        with open(fetch_profile_pics.INPUT_FILE, encoding='utf-8') as f:
+            items = len(json.load(f))
+    else:
+        items = args.names
+
+    requests_made = {endpoint: count - requests_before.get(endpoint, 0)
+                     for endpoint, count in server.state.requests.items()
+                     if count - requests_before.get(endpoint, 0)}
+
+    return {
+        'mode': mode,
+        'items': items,
+        'seconds': elapsed,
+        'items_per_sec': items / elapsed if elapsed else 0.0,
+        'stages': timer.summary(),
+        'requests': requests_made,
+        'injected_429s': server.state.injected_429s - injected_before,
+    }
+
+
+def print_report(report: Dict):
+    print(f"\n📊 {report['mode']}: {report['items']} items in {report['seconds']:.1f}s "
+          f"({report['items_per_sec']:.2f}/s)")
+    print(f"  {'stage':<22}{'count':>7}{'p50 ms':>10}{'p99 ms':>10}{'total s':>10}")
+    for stage, stats in report['stages'].items():
+        print(f"  {stage:<22}{stats['count']:>7}{stats['p50'] * 1000:>10.1f}"
+              f"{stats['p99'] * 1000:>10.1f}{stats['total']:>10.1f}")
+    print(f"  requests: {report['requests']}  injected 429s: {report['injected_429s']}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the scraper against the mock X API and Grok")
+    parser.add_argument('--names', type=int, default=576, help="Input rows (names.txt has 576)")
+    parser.add_argument('--modes', default=','.join(MODES), help=f"Comma-separated subset of {MODES}")
+    parser.add_argument('--x-latency', type=float, default=0.05)
+    parser.add_argument('--grok-latency', type=float, default=0.5)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of calls answered with 429")
+    parser.add_argument('--rate-limit', type=int, default=100000, help="Requests per endpoint per window")
+    parser.add_argument('--window', type=float, default=900.0)
+    parser.add_argument('--json', dest='json_path', help="Also write the reports to this JSON file")
+    parser.add_argument('--verbose', action='store_true', help="Show the scraper's own output")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    modes = [m.strip() for m in args.modes.split(',') if m.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        print(f"❌ ERROR: Unknown modes: {sorted(unknown)}")
+        return
+
+    config = MockConfig(x_latency=args.x_latency, grok_latency=args.grok_latency, error_rate=args.error_rate,
+                        rate_limit=args.rate_limit, window=args.window)
+    server = MockServer(config).start()
+
+    # Point the scraper at the mock server before its modules read the environment
+    os.environ['X_API_BASE_URL'] = server.url
+    for key in ['X_CONSUMER_KEY', 'X_CONSUMER_SECRET', 'X_ACCESS_TOKEN', 'X_ACCESS_TOKEN_SECRET', 'XAI_API_KEY']:
+        os.environ[key] = 'mock'
+
+    json_path = os.path.abspath(args.json_path) if args.json_path else None
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix='scraper-bench-')
+    os.chdir(workdir)
+    reports = []
+
+    try:
+        write_names('names.txt', args.names)
+        print(f"Benchmarking {modes} on {args.names} names against {server.url} (workdir: {workdir})")
+
+        for mode in modes:
+            if mode.startswith('profiles') and not os.path.exists('x_profiles_found.json'):
+                # Profile modes read the output of a names run
+                run_mode('async', server, args)
+            if mode.startswith('profiles'):
+                strip_profile_images('x_profiles_found.json')
+            report = run_mode(mode, server, args)
+            print_report(report)
+            reports.append(report)
+
+    finally:
+        os.chdir(cwd)
+        server.stop()
+
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+        print(f"\n📁 Reports saved to: {json_path}")
+
+
+if __name__ == '__main__':
+    main()
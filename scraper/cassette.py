@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Record/replay cassettes for X API and Grok traffic
+Recording saves every X response (keyed by endpoint and normalized
+parameters) and every Grok structured answer (keyed by a hash of the model,
+schema and messages) to a gzip-compressed JSONL file; replay serves them
+back from memory with no network, credentials or quota. Batched Grok
+answers are also saved per name, under the key of the single call for that
+name, because batches form by timing and differ between runs
+"""
+
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+from response_cache import CachedResponse, ResponseCache
+
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+
+KIND_X = 'x'
+KIND_GROK = 'grok'
+
+
+class Cassette:
+    """
+    In-memory map of recorded interactions, saved atomically on close
+    Recording into an existing cassette keeps its entries, so interrupted
+    or partial runs accumulate; the latest response for a key wins
+    """
+
+    def __init__(self, path: str, mode: str):
+        self.path = path
+        self.mode = mode
+        self.entries: Dict[str, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self.entries[self._slot(entry['kind'], entry['key'])] = entry
+        elif mode == MODE_REPLAY:
+            raise FileNotFoundError(f"No cassette at {path}; record one first")
+
+    @staticmethod
+    def _slot(kind: str, key: str) -> str:
+        return f"{kind}:{key}"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == MODE_REPLAY
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == MODE_RECORD
+
+    def get(self, kind: str, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self.entries.get(self._slot(kind, key))
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(self, kind: str, key: str, **fields):
+        with self._lock:
+            self.entries[self._slot(kind, key)] = {'kind': kind, 'key': key, **fields}
+            self._dirty = True
+
+    def save(self):
+        """Write the cassette (gzip JSONL) via a temp file and rename"""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = f"{self.path}.tmp"
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                for entry in self.entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        print(f"📼 Cassette saved: {self.path} ({len(self.entries)} interactions)")
+
+
+def x_key(path: str, params: Optional[Dict], *path_args: str) -> str:
+    """Host-independent key, so a cassette recorded against the mock server replays anywhere"""
+    return ResponseCache.make_key(path, path.format(*path_args), params)
+
+
+def replay_x(cassette: Cassette, key: str) -> CachedResponse:
+    entry = cassette.get(KIND_X, key)
+    if entry is None:
+        return CachedResponse(504, f"Not in cassette {cassette.path} (replay mode)")
+    return CachedResponse(entry['status'], entry['body'])
+
+
+def message_text(message) -> str:
+    # xai_sdk messages are protobufs with content[0].text; accept plain strings too
+    return message.content[0].text if hasattr(message, 'content') else str(message)
+
+
+def grok_key(model: str, schema_name: str, messages: List[str]) -> str:
+    payload = json.dumps([model, schema_name, messages], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def record_grok(cassette: Cassette, model: str, messages: List[str], parsed):
+    """Save a structured answer under the key a chat with these messages looks it up by"""
+    key = grok_key(model, type(parsed).__name__, messages)
+    cassette.put(KIND_GROK, key, body=parsed.model_dump_json())
+
+
+class CassetteMiss(Exception):
+    """A replayed Grok call that was never recorded"""
+
+
+class CassetteChat:
+    """Chat that records or replays parse() answers; mirrors the xai_sdk chat surface main.py uses"""
+
+    def __init__(self, cassette: Cassette, model: str, create_inner: Optional[Callable]):
+        self.cassette = cassette
+        self.model = model
+        self.messages: List[str] = []
+        # The real chat is only created when recording, so replay needs no API key
+        self.inner = create_inner() if create_inner else None
+
+    def append(self, message):
+        self.messages.append(message_text(message))
+        if self.inner is not None:
+            self.inner.append(message)
+        return self
+
+    def parse(self, schema):
+        key = grok_key(self.model, schema.__name__, self.messages)
+        if self.cassette.replaying:
+            entry = self.cassette.get(KIND_GROK, key)
+            if entry is None:
+                raise CassetteMiss(f"Grok call not in cassette {self.cassette.path}")
+            return None, schema.model_validate_json(entry['body'])
+
+        response, parsed = self.inner.parse(schema)
+        record_grok(self.cassette, self.model, self.messages, parsed)
+        return response, parsed
+
+
+class CassetteChatFactory:
+    def __init__(self, cassette: Cassette, get_inner_client: Callable):
+        self.cassette = cassette
+        self.get_inner_client = get_inner_client
+
+    def create(self, model: str, **kwargs) -> CassetteChat:
+        create_inner = None
+        if not self.cassette.replaying:
+            create_inner = lambda: self.get_inner_client().chat.create(model=model, **kwargs)
+        return CassetteChat(self.cassette, model, create_inner)
+
+
+class CassetteGrokClient:
+    """Drop-in for xai_sdk.Client as used by main.py; get_inner_client is only called when recording"""
+
+    def __init__(self, cassette: Cassette, get_inner_client: Callable):
+        self.chat = CassetteChatFactory(cassette, get_inner_client)
+
+
+def open_cassette(path: str, mode: str) -> Cassette:
+    """Load a cassette and make sure a recording is saved when the script exits"""
+    cassette = Cassette(path, mode)
+    if cassette.recording:
+        atexit.register(cassette.save)
+    print(f"📼 Cassette: {path} ({mode}, {len(cassette.entries)} interactions)")
+    return cassette
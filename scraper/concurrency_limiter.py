@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Adaptive (AIMD) concurrency limit for LLM calls
+The number of calls allowed in flight grows by about one per window of
+healthy completions and halves on 429s, timeouts or slow answers, the way
+TCP congestion control probes for capacity without overloading the endpoint
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import METRICS
+
+LATENCY_TARGET = 15.0  # seconds; slower calls count as a sign of overload
+DECREASE_FACTOR = 0.5
+DECREASE_COOLDOWN = 2.0  # seconds; one burst of failures only halves the limit once
+
+# Outcomes of a call
+OUTCOME_OK = 'ok'
+OUTCOME_OVERLOAD = 'overload'  # 429, timeout, unavailable: back off
+OUTCOME_ERROR = 'error'  # anything else: says nothing about load
+
+OVERLOAD_CODES = ['RESOURCE_EXHAUSTED', 'DEADLINE_EXCEEDED', 'UNAVAILABLE']
+TRANSIENT_CODES = OVERLOAD_CODES + ['ABORTED', 'INTERNAL']
+OVERLOAD_MARKERS = ['429', 'rate limit', 'resource exhausted', 'timed out', 'timeout', 'unavailable',
+                    'overloaded']
+TRANSIENT_MARKERS = OVERLOAD_MARKERS + ['500', '502', '503', '504', 'connection reset', 'internal error']
+
+
+def _error_code(error: Exception) -> str:
+    """gRPC status name for SDK errors (xai_sdk raises grpc.RpcError), '' otherwise"""
+    code = getattr(error, 'code', None)
+    if callable(code):
+        try:
+            return getattr(code(), 'name', str(code()))
+        except Exception:
+            return ''
+    return ''
+
+
+def is_overload(error: Exception) -> bool:
+    if isinstance(error, TimeoutError):
+        return True
+    code = _error_code(error)
+    if code:
+        return code in OVERLOAD_CODES
+    message = str(error).lower()
+    return any(marker in message for marker in OVERLOAD_MARKERS)
+
+
+def is_transient(error: Exception) -> bool:
+    """Worth retrying: overload, transport errors and 5xx-like failures"""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    code = _error_code(error)
+    if code:
+        return code in TRANSIENT_CODES
+    message = str(error).lower()
+    return any(marker in message for marker in TRANSIENT_MARKERS)
+
+
+class AIMDLimiter:
+    """
+    Thread-safe concurrency limit with additive increase, multiplicative decrease
+    Callers wrap each call in slot(); the limit is a float so growth of one
+    per window of `limit` completions is a +1/limit step per success
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 16,
+                 latency_target: float = LATENCY_TARGET, name: str = 'llm'):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.latency_target = latency_target
+        self.name = name
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float, outcome: str):
+        with self._cond:
+            self.in_flight -= 1
+            if outcome == OUTCOME_OK and latency <= self.latency_target:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            elif outcome == OUTCOME_OVERLOAD or (outcome == OUTCOME_OK and latency > self.latency_target):
+                now = time.monotonic()
+                if now - self._last_decrease >= DECREASE_COOLDOWN:
+                    self.limit = max(float(self.minimum), self.limit * DECREASE_FACTOR)
+                    self._last_decrease = now
+                    METRICS.inc('concurrency_decreases_total', limiter=self.name)
+            METRICS.set('concurrency_limit', self.limit, limiter=self.name)
+            self._cond.notify_all()
+
+    def set_maximum(self, maximum: int):
+        with self._cond:
+            self.maximum = maximum
+            self.limit = min(self.limit, float(maximum))
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Hold one unit of concurrency for a call; its latency and any exception feed the limit"""
+        self.acquire()
+        start = time.perf_counter()
+        outcome = OUTCOME_OK
+        try:
+            yield
+        except Exception as e:
+            outcome = OUTCOME_OVERLOAD if is_overload(e) else OUTCOME_ERROR
+            raise
+        finally:
+            self.release(time.perf_counter() - start, outcome)
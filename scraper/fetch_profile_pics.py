@@ -2,74 +2,58 @@
 """
 Fetch profile picture URLs for X profiles
 Reads x_profiles_found.json and creates hackathon_members.json with profile pictures
+main.py already keeps the image URL from its search, so only rows without
+one (e.g. usernames given in names.txt, older results) are looked up here
 """
 
+import argparse
 import json
-import os
-import time
-from typing import Optional
+from typing import Optional, List, Dict, Tuple
 from dotenv import load_dotenv
-import requests
-from requests_oauthlib import OAuth1
+
+from cassette import MODE_RECORD, MODE_REPLAY, open_cassette
+from incremental import ResultIndex
+from journal import Journal
+from members import (DEFAULT_PROFILE_IMAGE_URL, MEMBERS_FILE, build_member, has_valid_username, save_members,
+                     upgrade_profile_image_url)
+from metrics import METRICS
+from x_client import X_USERS_BY_USERNAME_PATH, X_USERS_BY_USERNAMES_PATH, get_client
 
 # Load environment variables from parent directory
 load_dotenv('/Users/advaitpaliwal/Projects/xpert/.env.local')
 
 # Configuration
-CONSUMER_KEY = os.getenv('X_CONSUMER_KEY')
-CONSUMER_SECRET = os.getenv('X_CONSUMER_SECRET')
-ACCESS_TOKEN = os.getenv('X_ACCESS_TOKEN')
-ACCESS_TOKEN_SECRET = os.getenv('X_ACCESS_TOKEN_SECRET')
-
-X_USERS_BY_USERNAME_ENDPOINT = 'https://api.x.com/2/users/by/username/{}'
-RATE_LIMIT_DELAY = 1  # seconds between requests
+# OAuth 1.0a credentials for the X API are read by x_client.XClient
+MAX_USERNAMES_PER_LOOKUP = 100  # X API limit for /2/users/by
 INPUT_FILE = 'x_profiles_found.json'
-OUTPUT_FILE = 'hackathon_members.json'
-
-
-def get_oauth_auth():
-    """Create OAuth 1.0a authentication"""
-    return OAuth1(
-        CONSUMER_KEY,
-        CONSUMER_SECRET,
-        ACCESS_TOKEN,
-        ACCESS_TOKEN_SECRET
-    )
+OUTPUT_FILE = MEMBERS_FILE
+JOURNAL_FILE = 'hackathon_members.jsonl'  # append-only checkpoint, compacted into OUTPUT_FILE
+METRICS_PROM_FILE = 'profile_pics_metrics.prom'
+METRICS_JSON_FILE = 'profile_pics_metrics.json'
 
 
+@METRICS.timed('profile_lookup')
 def fetch_user_profile_pic(username: str) -> Optional[str]:
     """
     Fetch profile picture URL for a given username
     Returns profile_image_url or None if error
     """
-    if not all([CONSUMER_KEY, CONSUMER_SECRET, ACCESS_TOKEN, ACCESS_TOKEN_SECRET]):
+    client = get_client()
+    if not client.can_request():
         print("ERROR: OAuth 1.0a credentials not found in environment variables")
         return None
 
-    auth = get_oauth_auth()
-    url = X_USERS_BY_USERNAME_ENDPOINT.format(username)
     params = {
         'user.fields': 'profile_image_url'
     }
 
     try:
-        response = requests.get(url, auth=auth, params=params)
+        response = client.get(X_USERS_BY_USERNAME_PATH, params, username)
 
         if response.status_code == 200:
             data = response.json()
             user_data = data.get('data', {})
-            profile_image_url = user_data.get('profile_image_url', '')
-
-            # X API returns profile images in low resolution (_normal),
-            # we can get higher resolution by replacing _normal with _400x400
-            if profile_image_url and '_normal' in profile_image_url:
-                profile_image_url = profile_image_url.replace('_normal', '_400x400')
-
-            return profile_image_url
-        elif response.status_code == 429:
-            print(f"  ⚠️ Rate limit hit, waiting 60 seconds...")
-            time.sleep(60)
-            return fetch_user_profile_pic(username)  # Retry
+            return upgrade_profile_image_url(user_data.get('profile_image_url', ''))
         else:
             print(f"  ❌ Error {response.status_code} for @{username}: {response.text}")
             return None
@@ -79,36 +63,200 @@ def fetch_user_profile_pic(username: str) -> Optional[str]:
         return None
 
 
-def process_profiles():
+@METRICS.timed('profile_lookup_batch')
+def fetch_profile_pics_batch(usernames: List[str]) -> Tuple[Optional[Dict[str, Optional[str]]], Optional[int]]:
+    """
+    Fetch profile picture URLs for up to MAX_USERNAMES_PER_LOOKUP usernames in one call
+    Returns (pics, None) with pics keyed by lowercased username; users X
+    reports in the per-user errors array (suspended, not found) map to None.
+    If the call itself failed returns (None, status code), with no status
+    code for credential or network failures
+    """
+    client = get_client()
+    if not client.can_request():
+        print("ERROR: OAuth 1.0a credentials not found in environment variables")
+        return None, None
+
+    params = {
+        'usernames': ','.join(usernames),
+        'user.fields': 'profile_image_url'
+    }
+
+    try:
+        response = client.get(X_USERS_BY_USERNAMES_PATH, params)
+
+        if response.status_code != 200:
+            print(f"  ❌ Error {response.status_code} for batch of {len(usernames)}: {response.text}")
+            return None, response.status_code
+
+        data = response.json()
+        pics: Dict[str, Optional[str]] = {}
+
+        # Usernames are case-insensitive on X, so map results back by lowercase name
+        for user_data in data.get('data', []):
+            pics[user_data.get('username', '').lower()] = upgrade_profile_image_url(
+                user_data.get('profile_image_url', '')
+            )
+
+        for error in data.get('errors', []):
+            value = error.get('value')
+            if value:
+                print(f"  ⚠️ @{value}: {error.get('detail') or error.get('title')}")
+                pics.setdefault(value.lower(), None)
+
+        return pics, None
+
+    except Exception as e:
+        print(f"  ❌ Exception during batch API call: {e}")
+        return None, None
+
+
+def lookup_profile_pics(usernames: List[str]) -> Dict[str, Optional[str]]:
+    """
+    Batched lookup that survives a malformed username: a chunk X rejects
+    with a 400 is split in half and retried, so one bad username costs only
+    itself. Auth, rate-limit, server and network failures aren't caused by
+    the input, so the chunk is given up once instead ({} -> placeholders)
+    """
+    pics, status_code = fetch_profile_pics_batch(usernames)
+    if pics is not None:
+        return pics
+    if status_code != 400 or len(usernames) == 1:
+        return {}
+
+    middle = len(usernames) // 2
+    print(f"  🔁 Splitting failed batch of {len(usernames)} in half")
+    return {**lookup_profile_pics(usernames[:middle]), **lookup_profile_pics(usernames[middle:])}
+
+
+def load_completed(journal: Journal) -> Dict[str, Dict]:
+    """Members journaled by an interrupted run, keyed by lowercased username"""
+    completed = {m['username'].lower(): m for m in journal.load()}
+    if completed:
+        print(f"Resuming: {len(completed)} members already done in {journal.path}")
+    return completed
+
+
+def load_carried(profiles: List[Dict]) -> Dict[str, Dict]:
+    """Incremental mode: members in OUTPUT_FILE still current for their row, keyed by lowercased username"""
+    index = ResultIndex(INPUT_FILE, OUTPUT_FILE)
+    carried = {}
+    for profile in profiles:
+        member = index.current_member(profile) if has_valid_username(profile) else None
+        if member:
+            carried[profile['username'].lower()] = member
+    print(f"♻️ Incremental: carrying forward {len(carried)} members from {OUTPUT_FILE}")
+    return carried
+
+
+def load_known(profiles: List[Dict]) -> Dict[str, Dict]:
+    """Members for rows whose image URL main.py already kept from the search, keyed by lowercased username"""
+    return {p['username'].lower(): build_member(p, p['profile_image_url'])
+            for p in profiles if has_valid_username(p) and p.get('profile_image_url')}
+
+
+def process_profiles_batched(incremental: bool = False):
+    """Batched processing: one /2/users/by lookup per MAX_USERNAMES_PER_LOOKUP profiles"""
+    print(f"Starting Profile Picture Fetcher (batched lookup)...")
+    print(f"Reading from: {INPUT_FILE}")
+    print(f"Output will be saved to: {OUTPUT_FILE}")
+    print("-" * 60)
+
+    if not get_client().can_request():
+        print("\n❌ ERROR: Please set OAuth 1.0a credentials in your .env.local file")
+        return
+
+    journal = Journal(JOURNAL_FILE)
+
+    try:
+        with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+            profiles = json.load(f)
+
+        completed = {**load_known(profiles), **load_completed(journal)}
+        if incremental:
+            completed = {**load_carried(profiles), **completed}
+        valid_profiles = [p for p in profiles if has_valid_username(p)]
+        pending = [p for p in valid_profiles if p['username'].lower() not in completed]
+        print(f"Found {len(profiles)} profiles, {len(pending)} usernames to look up\n")
+
+        for start in range(0, len(pending), MAX_USERNAMES_PER_LOOKUP):
+            chunk = pending[start:start + MAX_USERNAMES_PER_LOOKUP]
+            print(f"[{start + 1}-{start + len(chunk)}/{len(pending)}] Looking up {len(chunk)} users...")
+
+            pics = lookup_profile_pics([p['username'] for p in chunk])
+
+            for profile in chunk:
+                profile_image_url = pics.get(profile['username'].lower())
+                if not profile_image_url:
+                    print(f"  ⚠️ No profile pic for @{profile['username']}, using placeholder")
+                member = build_member(profile, profile_image_url)
+                completed[profile['username'].lower()] = member
+                journal.append(member)
+
+        hackathon_members = [completed[p['username'].lower()] for p in valid_profiles]
+        missing = sum(1 for m in hackathon_members if m['profile_image_url'] == DEFAULT_PROFILE_IMAGE_URL)
+        save_members(hackathon_members, OUTPUT_FILE)
+        journal.remove()
+
+        print("\n" + "-" * 60)
+        print(f"✅ Summary:")
+        print(f"  Total profiles processed: {len(profiles)}")
+        print(f"  Looked up: {len(pending)}")
+        print(f"  Members with profile pics: {len(hackathon_members) - missing}")
+        print(f"  Members using placeholder: {missing}")
+        print(f"\n📁 Results saved to: {OUTPUT_FILE}")
+
+    except FileNotFoundError:
+        print(f"❌ ERROR: Could not find {INPUT_FILE}")
+        print(f"   Please make sure {INPUT_FILE} exists in the current directory")
+    except json.JSONDecodeError as e:
+        print(f"❌ ERROR: Invalid JSON in {INPUT_FILE}: {e}")
+    except Exception as e:
+        print(f"❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        journal.close()
+        METRICS.export(METRICS_PROM_FILE, METRICS_JSON_FILE)
+
+
+def process_profiles(incremental: bool = False):
     """Main processing loop"""
     print(f"Starting Profile Picture Fetcher...")
     print(f"Reading from: {INPUT_FILE}")
     print(f"Output will be saved to: {OUTPUT_FILE}")
     print("-" * 60)
 
-    if not all([CONSUMER_KEY, CONSUMER_SECRET, ACCESS_TOKEN, ACCESS_TOKEN_SECRET]):
+    if not get_client().can_request():
         print("\n❌ ERROR: Please set OAuth 1.0a credentials in your .env.local file")
         return
 
+    journal = Journal(JOURNAL_FILE)
+
     try:
         # Read existing profiles
         with open(INPUT_FILE, 'r', encoding='utf-8') as f:
             profiles = json.load(f)
 
+        completed = {**load_known(profiles), **load_completed(journal)}
+        if incremental:
+            completed = {**load_carried(profiles), **completed}
         print(f"Found {len(profiles)} profiles to process\n")
 
         hackathon_members = []
 
         for idx, profile in enumerate(profiles, 1):
             username = profile.get('username')
-            full_name = profile.get('full_name', profile.get('original_name', ''))
-            profile_url = profile.get('profile_url', '')
 
             # Skip entries without valid username
-            if not username or username in ['NOT_FOUND', 'ERROR']:
+            if not has_valid_username(profile):
                 print(f"[{idx}/{len(profiles)}] Skipping: {profile.get('original_name')} (no valid username)")
                 continue
 
+            if username.lower() in completed:
+                hackathon_members.append(completed[username.lower()])
+                continue
+
             print(f"[{idx}/{len(profiles)}] Fetching profile pic for: @{username}")
 
             # Fetch profile picture
@@ -118,24 +266,16 @@ def process_profiles():
                 print(f"  ✓ Got profile pic: {profile_image_url}")
             else:
                 print(f"  ⚠️ Could not fetch profile pic, using placeholder")
-                # Use a default X profile icon as fallback
-                profile_image_url = "https://abs.twimg.com/sticky/default_profile_images/default_profile_400x400.png"
-
-            # Create member entry
-            member = {
-                'username': username,
-                'full_name': full_name,
-                'profile_url': profile_url,
-                'profile_image_url': profile_image_url
-            }
+
+            # Create member entry (default X profile icon as fallback)
+            member = build_member(profile, profile_image_url)
             hackathon_members.append(member)
 
             # Save incrementally
-            with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-                json.dump(hackathon_members, f, indent=2, ensure_ascii=False)
+            journal.append(member)
 
-            # Rate limiting
-            time.sleep(RATE_LIMIT_DELAY)
+        save_members(hackathon_members, OUTPUT_FILE)
+        journal.remove()
 
         # Summary
         print("\n" + "-" * 60)
@@ -153,7 +293,33 @@ def process_profiles():
         print(f"❌ ERROR: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        journal.close()
+        METRICS.export(METRICS_PROM_FILE, METRICS_JSON_FILE)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fetch profile picture URLs for X profiles")
+    parser.add_argument('--batch', action='store_true',
+                        help=f"Look up {MAX_USERNAMES_PER_LOOKUP} usernames per request via /2/users/by")
+    parser.add_argument('--incremental', action='store_true',
+                        help=f"Reuse members in {OUTPUT_FILE} built after their row in {INPUT_FILE} was processed")
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument('--record', metavar='FILE',
+                                help="Record every X response to a gzip JSONL cassette")
+    cassette_group.add_argument('--replay', metavar='FILE',
+                                help="Serve X lookups from a recorded cassette, with no network or credentials")
+    return parser.parse_args()
 
 
 if __name__ == '__main__':
-    process_profiles()
+    args = parse_args()
+    if args.record:
+        get_client().cassette = open_cassette(args.record, MODE_RECORD)
+    elif args.replay:
+        get_client().cassette = open_cassette(args.replay, MODE_REPLAY)
+
+    if args.batch:
+        process_profiles_batched(args.incremental)
+    else:
+        process_profiles(args.incremental)
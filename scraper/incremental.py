@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Incremental re-runs
+Indexes the previous run's x_profiles_found.json (by normalized name) and
+hackathon_members.json (by username) so only new, unmatched, low-confidence
+or stale rows are processed again; everything else is carried forward
+without any API calls
+"""
+
+import json
+import os
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from local_matcher import normalize_name
+from members import DEFAULT_PROFILE_IMAGE_URL
+
+RESULT_TTL_DAYS = 30.0  # results older than this are looked up again
+REPROCESS_CONFIDENCES = ['low', 'none']
+NOT_FOUND_USERNAMES = ['NOT_FOUND', 'ERROR']
+
+
+def timestamp() -> str:
+    """UTC time a result row was produced, stored as processed_at"""
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def load_records(path: str) -> Tuple[List[Dict], float]:
+    """Records of a previous output file and its mtime ([] and 0 if there is none)"""
+    if not os.path.exists(path):
+        return [], 0.0
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f), os.path.getmtime(path)
+
+
+class ResultIndex:
+    """
+    Previous results by normalized original_name and previous members by
+    lowercased username. Rows written before processed_at existed are aged
+    by their file's mtime.
+    """
+
+    def __init__(self, results_path: str, members_path: Optional[str] = None,
+                 ttl_days: float = RESULT_TTL_DAYS):
+        self.ttl = ttl_days * 24 * 3600
+        results, self.results_mtime = load_records(results_path)
+        members, self.members_mtime = load_records(members_path) if members_path else ([], 0.0)
+        self.by_name = {normalize_name(r.get('original_name', '')): r for r in results}
+        self.by_username = {m['username'].lower(): m for m in members if m.get('username')}
+
+    def processed_at(self, result: Dict) -> float:
+        return parse_timestamp(result.get('processed_at')) or self.results_mtime
+
+    def refresh_reason(self, result: Optional[Dict], now: float) -> Optional[str]:
+        """Why a name has to be processed again, or None if its previous result still stands"""
+        if result is None:
+            return 'new'
+        if result.get('username') in NOT_FOUND_USERNAMES:
+            return 'not_found'
+        if result.get('confidence') in REPROCESS_CONFIDENCES:
+            return 'low_confidence'
+        if now - self.processed_at(result) > self.ttl:
+            return 'stale'
+        return None
+
+    def carry_forward(self, rows: List[Tuple[str, Optional[str]]]) -> Tuple[Dict[str, Dict], Counter]:
+        """
+        Previous results that still stand, keyed by the current input name,
+        plus a count of why the remaining names need work. rows are
+        (name, username from the Title column or None); a given username
+        always replaces whatever the previous run matched
+        """
+        now = time.time()
+        carried = {}
+        reasons: Counter = Counter()
+        for name, existing_username in rows:
+            result = self.by_name.get(normalize_name(name))
+            reason = 'username_given' if existing_username else self.refresh_reason(result, now)
+            if reason:
+                reasons[reason] += 1
+            else:
+                carried[name] = dict(result, original_name=name)
+        return carried, reasons
+
+    def current_member(self, profile: Dict) -> Optional[Dict]:
+        """
+        The previous member entry for a result row, if it was built after the
+        row was last processed, is itself within the TTL and has a real image;
+        members on the placeholder avatar are looked up again
+        """
+        member = self.by_username.get((profile.get('username') or '').lower())
+        if member is None or member.get('profile_image_url') in ('', None, DEFAULT_PROFILE_IMAGE_URL):
+            return None
+        if self.members_mtime < self.processed_at(profile) or time.time() - self.members_mtime > self.ttl:
+            return None
+        return member
+
+
+def print_plan(carried: int, reasons: Counter):
+    details = ', '.join(f"{count} {reason.replace('_', ' ')}" for reason, count in reasons.most_common())
+    print(f"♻️ Incremental: carrying forward {carried} rows, processing {sum(reasons.values())}"
+          + (f" ({details})" if details else ""))
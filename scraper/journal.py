@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Append-only JSONL journal for crash-safe incremental saves
+Each finished record is one line; fsyncs are batched, and the journal is
+compacted to the final JSON file once a run completes
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from metrics import METRICS
+
+FSYNC_EVERY = 20  # records between fsyncs
+FSYNC_INTERVAL = 2.0  # max seconds between fsyncs
+
+
+class Journal:
+    """
+    Append-only JSONL file of finished records
+    A torn last line (crash mid-write) is dropped on load, so at most the
+    records since the last fsync are lost and nothing earlier is corrupted
+    """
+
+    def __init__(self, path: str, fsync_every: int = FSYNC_EVERY, fsync_interval: float = FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+
+    def load(self) -> List[Dict]:
+        """Read every complete record, truncating a torn trailing line"""
+        if not os.path.exists(self.path):
+            return []
+
+        records = []
+        good_offset = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                good_offset += len(line)
+
+        if good_offset < os.path.getsize(self.path):
+            print(f"  ⚠️ Dropping torn record at end of {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_offset)
+
+        return records
+
+    def append(self, record: Dict):
+        """Append one record; fsync every fsync_every records or fsync_interval seconds"""
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with METRICS.timer('stage_seconds', stage='save'), self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            if (self._unsynced >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync()
+        METRICS.inc('bytes_written_total', len(line.encode('utf-8')), file=self.path)
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        METRICS.inc('fsyncs_total', file=self.path)
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+
+    def touch(self):
+        """Create the file even if nothing was appended, so an empty journal isn't mistaken for a missing one"""
+        with self._lock:
+            if self._file is None:
+                open(self.path, 'a', encoding='utf-8').close()
+
+    def remove(self):
+        """Delete the journal once its records have been compacted"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def write_json_atomic(path: str, data, indent: Optional[int] = 2):
+    """Write JSON via a temp file and rename, so readers never see a partial file"""
+    tmp_path = f"{path}.tmp"
+    text = json.dumps(data, indent=indent, ensure_ascii=False)
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    METRICS.inc('bytes_written_total', len(text.encode('utf-8')), file=path)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Deterministic local pre-matcher
+Scores search candidates from the search payload alone (name similarity,
+bio keywords, verified and follower signals) so unambiguous names can skip Grok
+"""
+
+import math
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Bio/name keywords suggesting someone at an xAI hackathon
+BIO_KEYWORDS = ['xai', 'grok', 'hackathon', 'engineer', 'researcher', 'founder', 'builder',
+                'building', 'developer', 'ml', 'ai', 'cs', 'student']
+MAX_KEYWORD_HITS = 2
+
+EXACT_NAME_THRESHOLD = 0.95  # a winner must match the name at least this well
+CLEAR_WIN_MARGIN = 0.25  # ...and beat the runner-up score by this much
+MIN_NAME_TOKENS = 2  # single-token names ("Adam") always go to Grok
+
+KEYWORD_WEIGHT = 0.15
+VERIFIED_WEIGHT = 0.05
+FOLLOWERS_WEIGHT = 0.05
+
+
+class CandidateScore(NamedTuple):
+    candidate: Dict
+    name_similarity: float
+    keyword_hits: List[str]
+    score: float
+
+
+def split_query(query: str) -> Tuple[str, List[str]]:
+    """Split 'Umesh Khanna (xAI)' into the name and its parenthesised affiliations"""
+    affiliations = [a.strip().lower() for a in re.findall(r'\(([^)]*)\)', query) if a.strip()]
+    name = re.sub(r'\([^)]*\)', ' ', query)
+    return name, affiliations
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, strip accents, emoji and punctuation: 'Umesh Khanna 🇨🇦' -> 'umesh khanna'"""
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(ch for ch in name if not unicodedata.combining(ch))
+    name = re.sub(r'[^a-z0-9 ]', ' ', name.lower())
+    return ' '.join(name.split())
+
+
+def name_similarity(query_name: str, candidate: Dict) -> float:
+    """1.0 for a normalized exact match, otherwise the best fuzzy ratio of display name or username"""
+    if not query_name:
+        return 0.0
+
+    display_name = normalize_name(candidate.get('name', ''))
+    if display_name == query_name:
+        return 1.0
+
+    # Word order and extra tokens ("Abhay Lal @NeurIPS 2025") shouldn't sink the score
+    query_tokens = set(query_name.split())
+    display_tokens = set(display_name.split())
+    token_ratio = len(query_tokens & display_tokens) / len(query_tokens)
+    fuzzy_ratio = SequenceMatcher(None, query_name, display_name).ratio()
+
+    squashed_query = query_name.replace(' ', '')
+    username = normalize_name(candidate.get('username', '')).replace(' ', '')
+    username_ratio = SequenceMatcher(None, squashed_query, username).ratio()
+
+    return max(token_ratio * 0.97, fuzzy_ratio, username_ratio * 0.95)
+
+
+def keyword_hits(candidate: Dict, affiliations: List[str]) -> List[str]:
+    """Keywords (including the query's affiliations) found as words in the bio or display name"""
+    text = normalize_name(f"{candidate.get('description', '')} {candidate.get('name', '')}")
+    words = set(text.split())
+    hits = [kw for kw in BIO_KEYWORDS + affiliations if kw in words]
+    return list(dict.fromkeys(hits))
+
+
+def score_candidates(query: str, candidates: List[Dict]) -> List[CandidateScore]:
+    """Score every candidate, best first"""
+    name, affiliations = split_query(query)
+    query_name = normalize_name(name)
+
+    scores = []
+    for candidate in candidates:
+        similarity = name_similarity(query_name, candidate)
+        hits = keyword_hits(candidate, affiliations)
+        followers = candidate.get('public_metrics', {}).get('followers_count', 0)
+
+        score = (similarity
+                 + KEYWORD_WEIGHT * min(len(hits), MAX_KEYWORD_HITS)
+                 + VERIFIED_WEIGHT * bool(candidate.get('verified'))
+                 + FOLLOWERS_WEIGHT * min(math.log10(followers + 1) / 5, 1.0))
+        scores.append(CandidateScore(candidate, similarity, hits, score))
+
+    return sorted(scores, key=lambda s: s.score, reverse=True)
+
+
+def pick_clear_winner(query: str, candidates: List[Dict]) -> Optional[CandidateScore]:
+    """
+    The top candidate if it clearly wins, else None (ambiguous, ask Grok)
+    Requires a multi-token name, a (near) exact name match that no other
+    candidate shares (homonyms are Grok's call, whatever their bios say),
+    and a clear margin over the runner-up
+    """
+    name, _ = split_query(query)
+    if len(normalize_name(name).split()) < MIN_NAME_TOKENS or not candidates:
+        return None
+
+    scores = score_candidates(query, candidates)
+    best = scores[0]
+    if best.name_similarity < EXACT_NAME_THRESHOLD:
+        return None
+    if any(other.name_similarity >= EXACT_NAME_THRESHOLD for other in scores[1:]):
+        return None
+    if len(scores) > 1 and best.score - scores[1].score < CLEAR_WIN_MARGIN:
+        return None
+    return best
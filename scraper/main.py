@@ -4,42 +4,87 @@ X Profile Scraper with Grok AI
 Searches for X (Twitter) profiles and uses Grok to intelligently match the correct person
 """
 
+import argparse
+import asyncio
 import csv
 import json
 import os
 import re
+import subprocess
 import sys
+import threading
 import time
-from typing import Optional, List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Tuple, Union
 from enum import Enum
 from dotenv import load_dotenv
-import requests
-from requests_oauthlib import OAuth1
 from pydantic import BaseModel, Field
 from xai_sdk import Client
 from xai_sdk.chat import system, user
 
+from cassette import MODE_RECORD, MODE_REPLAY, Cassette, CassetteGrokClient, open_cassette, record_grok
+from concurrency_limiter import AIMDLimiter, is_transient
+from incremental import ResultIndex, print_plan, timestamp
+from journal import Journal, write_json_atomic
+from local_matcher import pick_clear_winner, score_candidates
+from members import DEFAULT_PROFILE_IMAGE_URL, MEMBERS_FILE, load_members, members_from_results, save_members, upgrade_profile_image_url
+from memo import SingleFlightLRU
+from metrics import METRICS
+from prompt_builder import MAX_TWEETS_PER_CANDIDATE, PROMPT_TOKEN_BUDGET, build_prompt, estimate_tokens
+from rate_limiter import backoff_delay
+from response_cache import MODE_CACHE_ONLY, MODE_NORMAL, MODE_REFRESH, ResponseCache
+from sharding import (Shard, credentials_for_shard, in_shard, load_credential_pool, parse_shard,
+                      shard_path, shard_paths, stray_shard_paths)
+from work_queue import QUEUE_FILE, VISIBILITY_TIMEOUT, WorkQueue
+from x_client import X_USERS_SEARCH_PATH, X_USERS_TWEETS_PATH, configure_client, get_client
+
 # Load environment variables from parent directory
 load_dotenv('/Users/advaitpaliwal/Projects/xpert/.env.local')
 
 # Configuration
-# OAuth 1.0a credentials for X API
-CONSUMER_KEY = os.getenv('X_CONSUMER_KEY')
-CONSUMER_SECRET = os.getenv('X_CONSUMER_SECRET')
-ACCESS_TOKEN = os.getenv('X_ACCESS_TOKEN')
-ACCESS_TOKEN_SECRET = os.getenv('X_ACCESS_TOKEN_SECRET')
+# OAuth 1.0a credentials for the X API are read by x_client.XClient
 
 # Grok API
 XAI_API_KEY = os.getenv('XAI_API_KEY')
+GROK_MODEL = "grok-4-1-fast-non-reasoning"
 
-X_USERS_SEARCH_ENDPOINT = 'https://api.x.com/2/users/search'
-X_USERS_TWEETS_ENDPOINT = 'https://api.x.com/2/users/{}/tweets'
-RATE_LIMIT_DELAY = 1  # seconds between requests
 MAX_RESULTS_PER_QUERY = 10
-MAX_TWEETS_PER_USER = 10
+TOP_K_TIMELINES = 2  # candidates per name whose timelines are fetched
+TWEET_MEMO_SIZE = 5000  # user ids whose timelines are kept in memory for the run
 INPUT_FILE = 'names.txt'
 OUTPUT_JSON = 'x_profiles_found.json'
 OUTPUT_CSV = 'x_profiles_found.csv'
+JOURNAL_FILE = 'x_profiles_found.jsonl'  # append-only checkpoint, compacted into OUTPUT_JSON
+METRICS_PROM_FILE = 'scraper_metrics.prom'
+METRICS_JSON_FILE = 'scraper_metrics.json'
+
+# The same account often shows up in the search results of several names
+TWEET_MEMO = SingleFlightLRU(TWEET_MEMO_SIZE)
+
+# On-disk X response cache: TTL in seconds per endpoint
+CACHE_TTLS = {
+    X_USERS_SEARCH_PATH: 7 * 24 * 3600,
+    X_USERS_TWEETS_PATH: 24 * 3600,
+}
+CSV_FIELDNAMES = ['original_name', 'username', 'full_name',
+                  'profile_url', 'verified', 'followers', 'confidence', 'reasoning', 'source',
+                  'profile_image_url']
+
+# Async pipeline: bounded concurrency per stage
+SEARCH_CONCURRENCY = 2
+TWEETS_CONCURRENCY = 8
+GROK_CONCURRENCY = 8  # Grok workers; the ceiling for GROK_LIMITER
+GROK_BATCH_SIZE = 8  # names per Grok call in the async pipeline (1 disables batching)
+GROK_BATCH_MAX_TOKENS = 10000  # prompt-size budget for one batched call
+GROK_BATCH_LINGER = 0.5  # seconds to wait for a batch to fill
+GROK_INITIAL_CONCURRENCY = 2  # Grok calls in flight at start; AIMD grows it while calls stay healthy
+GROK_MAX_RETRIES = 4  # retries for 429s, timeouts and other transient Grok errors
+
+# Adapts how many Grok calls run at once to what the endpoint can take
+GROK_LIMITER = AIMDLimiter(GROK_INITIAL_CONCURRENCY, maximum=GROK_CONCURRENCY, name='grok')
+
+# Work-queue mode
+QUEUE_POLL_INTERVAL = 5.0  # max seconds an idle worker sleeps before looking for leasable rows again
 
 
 # Pydantic Schema for Grok Structured Output
@@ -56,14 +101,16 @@ class MatchResult(BaseModel):
     reasoning: str = Field(description="Brief explanation of why this match was chosen")
 
 
-def get_oauth_auth():
-    """Create OAuth 1.0a authentication"""
-    return OAuth1(
-        CONSUMER_KEY,
-        CONSUMER_SECRET,
-        ACCESS_TOKEN,
-        ACCESS_TOKEN_SECRET
-    )
+class QueryMatchResult(MatchResult):
+    query_id: int = Field(description="The number of the query this match answers")
+
+
+class BatchMatchResult(BaseModel):
+    matches: List[QueryMatchResult] = Field(description="One match per query")
+
+
+class GrokError(Exception):
+    """A Grok call that failed for good (retries exhausted or not retryable)"""
 
 
 def clean_search_query(query: str) -> str:
@@ -78,35 +125,33 @@ def clean_search_query(query: str) -> str:
     return query[:50].strip()
 
 
+@METRICS.timed('search')
 def search_x_users(query: str) -> Optional[List[Dict]]:
     """
     Search for X users matching the query
     Returns list of user results or None if error
     """
-    if not all([CONSUMER_KEY, CONSUMER_SECRET, ACCESS_TOKEN, ACCESS_TOKEN_SECRET]):
+    client = get_client()
+    if not client.can_request():
         print("ERROR: OAuth 1.0a credentials not found in environment variables")
         return None
 
     # Clean query for X API requirements
     cleaned_query = clean_search_query(query)
 
-    auth = get_oauth_auth()
     params = {
         'query': cleaned_query,
         'max_results': MAX_RESULTS_PER_QUERY,
-        'user.fields': 'id,name,username,description,public_metrics,verified,verified_type,created_at'
+        'user.fields': 'id,name,username,description,public_metrics,verified,verified_type,created_at,'
+                       'profile_image_url'
     }
 
     try:
-        response = requests.get(X_USERS_SEARCH_ENDPOINT, auth=auth, params=params)
+        response = client.get(X_USERS_SEARCH_PATH, params)
 
         if response.status_code == 200:
             data = response.json()
             return data.get('data', [])
-        elif response.status_code == 429:
-            print(f"  ⚠️ Rate limit hit, waiting 60 seconds...")
-            time.sleep(60)
-            return search_x_users(query)  # Retry
         else:
             print(f"  ❌ Error {response.status_code}: {response.text}")
             return None
@@ -116,28 +161,24 @@ def search_x_users(query: str) -> Optional[List[Dict]]:
         return None
 
 
+@METRICS.timed('tweets')
 def get_user_tweets(user_id: str) -> Optional[List[Dict]]:
     """
     Fetch recent tweets for a user
     Returns list of tweets or None if error
     """
-    auth = get_oauth_auth()
-    url = X_USERS_TWEETS_ENDPOINT.format(user_id)
     params = {
-        'max_results': MAX_TWEETS_PER_USER,
+        # Fetch only as many tweets as the Grok prompt can show
+        'max_results': MAX_TWEETS_PER_CANDIDATE,
         'tweet.fields': 'created_at,text,public_metrics'
     }
 
     try:
-        response = requests.get(url, auth=auth, params=params)
+        response = get_client().get(X_USERS_TWEETS_PATH, params, user_id)
 
         if response.status_code == 200:
             data = response.json()
             return data.get('data', [])
-        elif response.status_code == 429:
-            print(f"  ⚠️ Rate limit hit for tweets, waiting 60 seconds...")
-            time.sleep(60)
-            return get_user_tweets(user_id)
         else:
             # User might have no tweets or protected account
             return []
@@ -147,12 +188,93 @@ def get_user_tweets(user_id: str) -> Optional[List[Dict]]:
         return []
 
 
+def get_user_tweets_memoized(user_id: str) -> List[Dict]:
+    """get_user_tweets, fetched at most once per user id per run"""
+    return TWEET_MEMO.get_or_compute(user_id, lambda: get_user_tweets(user_id))
+
+
+GROK_SYSTEM_PROMPT = """Match the person to their X profile. These people are at an xAI hackathon.
+
+Look for name matches and profiles that suggest they'd attend hackathons (engineers, researchers, builders). Consider xAI/tech mentions in bio and tweets. Always pick the best match from the candidates."""
+
+GROK_BATCH_SYSTEM_PROMPT = GROK_SYSTEM_PROMPT + """
+
+You will get several queries, each with its own candidates. Return exactly one match per query, tagged with its query number, picking only from that query's candidates."""
+
+_grok_client: Optional[Client] = None
+_grok_client_lock = threading.Lock()
+_cassette: Optional[Cassette] = None  # set by enable_cassette (--record / --replay)
+
+
+def get_grok_client() -> Client:
+    """Shared xAI client, reused across calls instead of reconnecting per name"""
+    global _grok_client
+    with _grok_client_lock:
+        if _grok_client is None:
+            _grok_client = Client(api_key=XAI_API_KEY)
+        return _grok_client
+
+
+def get_grok_chat_client():
+    """The client Grok chats are created on: the cassette's when recording or replaying"""
+    if _cassette is not None:
+        return CassetteGrokClient(_cassette, get_grok_client)
+    return get_grok_client()
+
+
+def grok_available() -> bool:
+    """An API key is set, or Grok answers are replayed from a cassette"""
+    return bool(XAI_API_KEY) or (_cassette is not None and _cassette.replaying)
+
+
+def build_candidates_context(original_name: str, candidates: List[Dict],
+                             token_budget: int = PROMPT_TOKEN_BUDGET) -> str:
+    """Describe a query and its candidates for Grok, within token_budget (see prompt_builder)"""
+    return build_prompt(original_name, candidates, token_budget).text
+
+
+def parse_with_retries(chat, schema, kind: str):
+    """
+    chat.parse through GROK_LIMITER, retrying transient errors with backoff
+    Raises GrokError once retries run out or the error isn't transient
+    """
+    for attempt in range(GROK_MAX_RETRIES + 1):
+        try:
+            with GROK_LIMITER.slot():
+                METRICS.inc('llm_calls_total', kind=kind)
+                return chat.parse(schema)
+        except Exception as e:
+            if not is_transient(e) or attempt == GROK_MAX_RETRIES:
+                METRICS.inc('llm_errors_total', kind=kind)
+                raise GrokError(f"{type(e).__name__}: {e}") from e
+            METRICS.inc('llm_retries_total', kind=kind)
+            print(f"  ⚠️ Grok {kind} call failed ({e}); retrying (attempt {attempt + 1}/{GROK_MAX_RETRIES})")
+            time.sleep(backoff_delay(attempt))
+
+
+def resolve_match(match_result: MatchResult, candidates: List[Dict]) -> Optional[Dict]:
+    """Map Grok's answer back to one of the candidates, or None if it isn't one"""
+    # Strip @ if Grok included it
+    matched_username = match_result.matched_username.lstrip('@')
+
+    for candidate in candidates:
+        if candidate.get('username') == matched_username:
+            return {
+                'user': candidate,
+                'confidence': match_result.confidence,
+                'reasoning': match_result.reasoning
+            }
+    return None
+
+
+@METRICS.timed('grok')
 def grok_match_user(original_name: str, candidates: List[Dict]) -> Optional[Dict]:
     """
     Use Grok AI to intelligently match the correct user from candidates
-    Returns the matched user dict or None
+    Returns the matched user dict, or None if Grok's answer isn't one of
+    the candidates; raises GrokError if Grok couldn't be reached
     """
-    if not XAI_API_KEY:
+    if not grok_available():
         print("ERROR: XAI_API_KEY not found in environment variables")
         return None
 
@@ -160,234 +282,1030 @@ def grok_match_user(original_name: str, candidates: List[Dict]) -> Optional[Dict
         return None
 
     # Build the context for Grok
-    context = f"Original search query: {original_name}\n\n"
-    context += "Candidate users:\n\n"
-
-    for idx, candidate in enumerate(candidates, 1):
-        context += f"Candidate {idx}:\n"
-        context += f"  Username: @{candidate.get('username')}\n"
-        context += f"  Full Name: {candidate.get('name')}\n"
-        context += f"  Bio: {candidate.get('description', 'No bio')}\n"
-        context += f"  Verified: {candidate.get('verified', False)}\n"
-        context += f"  Followers: {candidate.get('public_metrics', {}).get('followers_count', 0)}\n"
-
-        # Add recent tweets
-        tweets = candidate.get('tweets', [])
-        if tweets:
-            context += f"  Recent tweets:\n"
-            for tweet in tweets[:5]:  # Show first 5 tweets
-                tweet_text = tweet.get('text', '')[:150]  # Truncate long tweets
-                context += f"    - {tweet_text}\n"
-        else:
-            context += f"  Recent tweets: None available\n"
-        context += "\n"
+    context = build_candidates_context(original_name, candidates)
+    prompt_tokens = estimate_tokens(GROK_SYSTEM_PROMPT) + estimate_tokens(context)
+    METRICS.observe('prompt_tokens', prompt_tokens, kind='single')
+    print(f"  📏 Prompt: ~{prompt_tokens} tokens")
 
     # Create Grok chat
     try:
-        client = Client(api_key=XAI_API_KEY)
-        chat = client.chat.create(model="grok-4-1-fast-non-reasoning")
-
-        chat.append(system("""Match the person to their X profile. These people are at an xAI hackathon.
-
-Look for name matches and profiles that suggest they'd attend hackathons (engineers, researchers, builders). Consider xAI/tech mentions in bio and tweets. Always pick the best match from the candidates."""))
-
+        chat = get_grok_chat_client().chat.create(model=GROK_MODEL)
+        chat.append(system(GROK_SYSTEM_PROMPT))
         chat.append(user(context))
 
         # Use structured output
-        _, match_result = chat.parse(MatchResult)
-
-        # Strip @ if Grok included it
-        matched_username = match_result.matched_username.lstrip('@')
+        _, match_result = parse_with_retries(chat, MatchResult, 'single')
 
-        print(f"  🎯 Grok picked: @{matched_username}")
+        print(f"  🎯 Grok picked: @{match_result.matched_username.lstrip('@')}")
         print(f"      Confidence: {match_result.confidence}")
         print(f"      Reasoning: {match_result.reasoning}")
 
-        # Find the matched user in candidates
-        for candidate in candidates:
-            if candidate.get('username') == matched_username:
-                return {
-                    'user': candidate,
-                    'confidence': match_result.confidence,
-                    'reasoning': match_result.reasoning
-                }
+        best_match = resolve_match(match_result, candidates)
+        if best_match:
+            return best_match
 
         # If username not found in candidates (shouldn't happen), return None
         print(f"  ⚠️ Username not found in candidates")
         print(f"      Candidates were: {[c.get('username') for c in candidates]}")
         return None
 
+    except GrokError as e:
+        print(f"  ❌ Grok API error: {e}")
+        raise
     except Exception as e:
+        # Client setup and chat building fail outside parse_with_retries
         print(f"  ❌ Grok API error: {e}")
+        raise GrokError(f"{type(e).__name__}: {e}") from e
+
+
+def record_single_answer(original_name: str, candidates: List[Dict], match_result: QueryMatchResult):
+    """Record a batched answer as the single call for this name, which is how a replay looks it up"""
+    messages = [GROK_SYSTEM_PROMPT, build_candidates_context(original_name, candidates)]
+    single_result = MatchResult(**match_result.model_dump(exclude={'query_id'}))
+    record_grok(_cassette, GROK_MODEL, messages, single_result)
+
+
+def grok_match_one(original_name: str, candidates: List[Dict]) -> Union[Optional[Dict], GrokError]:
+    """grok_match_user, with a failed call returned instead of raised"""
+    try:
+        return grok_match_user(original_name, candidates)
+    except GrokError as e:
+        return e
+
+
+@METRICS.timed('grok_batch')
+def grok_match_batch(queries: List[Tuple[str, List[Dict]]]) -> List[Union[Optional[Dict], GrokError]]:
+    """
+    Resolve several names with one Grok call
+    Any query whose answer is missing or doesn't name one of its candidates
+    falls back to a single grok_match_user call. Returns matches in query
+    order; a GrokError in place of a match means Grok couldn't be reached.
+    If the batch call itself fails, every query gets that GrokError rather
+    than a retry of its own, which would only add load to an overloaded endpoint
+    """
+    if len(queries) == 1:
+        return [grok_match_one(*queries[0])]
+
+    if not grok_available():
+        print("ERROR: XAI_API_KEY not found in environment variables")
+        return [None] * len(queries)
+
+    if _cassette is not None and _cassette.replaying:
+        # Batches form by timing, so a replay looks each name up as its own call
+        return [grok_match_one(name, candidates) for name, candidates in queries]
+
+    matches: List[Union[Optional[Dict], GrokError]] = [None] * len(queries)
+    answered = set()
+
+    context = "\n".join(
+        f"=== Query {query_id} ===\n{build_candidates_context(name, candidates)}"
+        for query_id, (name, candidates) in enumerate(queries, 1)
+    )
+    prompt_tokens = estimate_tokens(GROK_BATCH_SYSTEM_PROMPT) + estimate_tokens(context)
+    METRICS.observe('prompt_tokens', prompt_tokens, kind='batch')
+    print(f"  📏 Batch prompt: ~{prompt_tokens} tokens for {len(queries)} names")
+
+    try:
+        chat = get_grok_chat_client().chat.create(model=GROK_MODEL)
+        chat.append(system(GROK_BATCH_SYSTEM_PROMPT))
+        chat.append(user(context))
+        _, batch_result = parse_with_retries(chat, BatchMatchResult, 'batch')
+
+        for match_result in batch_result.matches:
+            idx = match_result.query_id - 1
+            if not 0 <= idx < len(queries) or idx in answered:
+                continue
+            best_match = resolve_match(match_result, queries[idx][1])
+            if best_match:
+                matches[idx] = best_match
+                answered.add(idx)
+                if _cassette is not None and _cassette.recording:
+                    record_single_answer(*queries[idx], match_result)
+
+    except Exception as e:
+        print(f"  ❌ Grok batch error ({len(queries)} names): {e}")
+        error = e if isinstance(e, GrokError) else GrokError(f"{type(e).__name__}: {e}")
+        return [error] * len(queries)
+
+    print(f"  🎯 Grok batch resolved {len(answered)}/{len(queries)} names in one call")
+    if answered:
+        METRICS.inc('llm_calls_avoided_total', len(answered) - 1, reason='batched')
+
+    for idx, (name, candidates) in enumerate(queries):
+        if idx not in answered:
+            print(f"  ↩️ No valid batch answer for {name}, retrying alone")
+            matches[idx] = grok_match_one(name, candidates)
+
+    return matches
+
+
+def load_completed(journal: Journal) -> Dict[str, Dict]:
+    """Results journaled by an interrupted run, keyed by original_name"""
+    completed = {r['original_name']: r for r in journal.load()}
+    if completed:
+        print(f"Resuming: {len(completed)} names already done in {journal.path}")
+    return completed
+
+
+def load_carried(names: List[Dict]) -> Dict[str, Dict]:
+    """Incremental mode: previous results that need no new lookups, keyed by original_name"""
+    rows = [parsed for parsed in map(parse_row, names) if parsed]
+    carried, reasons = ResultIndex(OUTPUT_JSON, MEMBERS_FILE).carry_forward(rows)
+    print_plan(len(carried), reasons)
+    return carried
+
+
+def add_carried(completed: Dict[str, Dict], names: List[Dict], journal: Journal,
+                shard: Optional[Shard] = None) -> Dict[str, Dict]:
+    """
+    Incremental mode: completed plus the carried-forward rows it doesn't have yet
+    A shard journals the rows it carries, so its journal is complete on its own
+    and merge_shards never re-derives them from a later, possibly different, OUTPUT_JSON
+    """
+    carried = {name: result for name, result in load_carried(names).items() if name not in completed}
+    if shard:
+        for result in carried.values():
+            journal.append(result)
+    return {**carried, **completed}
+
+
+def rank_candidates(original_name: str, candidates: List[Dict]) -> List[Dict]:
+    """Order candidates by local score (search payload only), best first"""
+    return [s.candidate for s in score_candidates(original_name, candidates)]
+
+
+@METRICS.timed('local_match')
+def local_match_user(original_name: str, candidates: List[Dict]) -> Optional[Dict]:
+    """
+    Pick the match locally when one candidate clearly wins on name, bio and
+    account signals; returns None for ambiguous cases, which go to Grok
+    """
+    winner = pick_clear_winner(original_name, candidates)
+    if not winner:
         return None
+    METRICS.inc('llm_calls_avoided_total', reason='local_match')
+
+    signals = [f"name similarity {winner.name_similarity:.2f}"]
+    if winner.keyword_hits:
+        signals.append(f"bio keywords: {', '.join(winner.keyword_hits)}")
+    if winner.candidate.get('verified'):
+        signals.append("verified")
+
+    match_result = MatchResult(
+        matched_username=winner.candidate.get('username'),
+        confidence=MatchConfidence.HIGH,
+        reasoning=f"Local match, clear winner among {len(candidates)} candidates ({'; '.join(signals)})"
+    )
 
+    return {
+        'user': winner.candidate,
+        'confidence': match_result.confidence.value,
+        'reasoning': match_result.reasoning,
+        'source': 'local_match'
+    }
 
-def save_results_incrementally(results: List[Dict]):
-    """Save results to JSON file incrementally"""
-    with open(OUTPUT_JSON, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
 
+def save_results(results: List[Dict]):
+    """Compact finished results into OUTPUT_JSON"""
+    write_json_atomic(OUTPUT_JSON, results)
 
-def process_names():
-    """Main processing loop"""
-    print(f"Starting X Profile Scraper with Grok AI...")
-    print(f"Reading from: {INPUT_FILE}")
-    print(f"Output will be saved to: {OUTPUT_JSON} and {OUTPUT_CSV}")
-    print("-" * 60)
 
-    if not all([CONSUMER_KEY, CONSUMER_SECRET, ACCESS_TOKEN, ACCESS_TOKEN_SECRET]):
-        print("\n❌ ERROR: Please set OAuth 1.0a credentials in your .env.local file")
+def parse_row(row: Dict) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    Extract (name, existing_username) from an input row
+    Returns None for blank rows and repeated headers
+    """
+    name = row.get('Name', '').strip()
+    title = row.get('Title', '').strip()
+
+    if not name or name == 'Name':  # Skip header
+        return None
+
+    # Extract existing username if present (e.g., "@alish2001_")
+    existing_username = None
+    if title.startswith('@'):
+        existing_username = title.replace('@', '')
+
+    return name, existing_username
+
+
+def load_names() -> List[Dict]:
+    """Read the input rows from INPUT_FILE"""
+    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        return list(reader)
+
+
+def select_shard(names: List[Dict], shard: Optional[Shard]) -> List[Dict]:
+    """The input rows this shard owns (all rows when not sharded)"""
+    if shard is None:
+        return names
+    return [row for row in names if in_shard(row.get('Name', '').strip(), shard)]
+
+
+def build_existing_result(name: str, username: str) -> Dict:
+    """Result row for a name that already came with a username"""
+    return {
+        'original_name': name,
+        'username': username,
+        'profile_url': f'https://x.com/{username}',
+        'confidence': 'existing',
+        'source': 'existing',
+        'processed_at': timestamp()
+    }
+
+
+def build_not_found_result(name: str, source: str) -> Dict:
+    """Result row for a name without a usable match"""
+    return {
+        'original_name': name,
+        'username': 'NOT_FOUND',
+        'profile_url': '',
+        'confidence': 'none',
+        'source': source,
+        'processed_at': timestamp()
+    }
+
+
+def build_match_result(name: str, best_match: Dict) -> Dict:
+    """Result row for a candidate picked locally or by Grok"""
+    user = best_match['user']
+    username = user.get('username')
+
+    return {
+        'original_name': name,
+        'username': username,
+        'full_name': user.get('name'),
+        'profile_url': f'https://x.com/{username}',
+        'verified': user.get('verified', False),
+        'followers': user.get('public_metrics', {}).get('followers_count', 0),
+        'profile_image_url': upgrade_profile_image_url(user.get('profile_image_url', '')),
+        'confidence': best_match['confidence'],
+        'reasoning': best_match['reasoning'],
+        'source': best_match.get('source', 'grok_match'),
+        'processed_at': timestamp()
+    }
+
+
+def write_members(results: List[Dict]):
+    """Write MEMBERS_FILE straight from the results, so fetch_profile_pics.py is only a fallback"""
+    members = members_from_results(results, load_members(MEMBERS_FILE))
+    save_members(members, MEMBERS_FILE)
+
+    missing = sum(1 for m in members if m['profile_image_url'] == DEFAULT_PROFILE_IMAGE_URL)
+    if missing:
+        print(f"  ⚠️ {missing} members have no profile pic yet; run fetch_profile_pics.py to look them up")
+
+
+def write_outputs(results: List[Dict]):
+    """Write the final JSON, CSV and members file"""
+    save_results(results)
+    write_csv(results)
+    write_members(results)
+
+
+def write_csv(results: List[Dict]):
+    """Write final results to OUTPUT_CSV"""
+    with open(OUTPUT_CSV, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def export_metrics(results: List[Dict], suffix: str = ''):
+    """Record end-of-run gauges and write the metrics files (suffix keeps parallel runs apart)"""
+    METRICS.set('tweet_memo_hits', TWEET_MEMO.hits)
+    METRICS.set('tweet_memo_misses', TWEET_MEMO.misses)
+    for source in sorted({r['source'] for r in results}):
+        METRICS.set('results', sum(1 for r in results if r['source'] == source), source=source)
+    prom_root, prom_ext = os.path.splitext(METRICS_PROM_FILE)
+    json_root, json_ext = os.path.splitext(METRICS_JSON_FILE)
+    METRICS.export(f"{prom_root}{suffix}{prom_ext}", f"{json_root}{suffix}{json_ext}")
+
+
+def print_summary(results: List[Dict], outputs: Optional[List[str]] = None):
+    """Print run summary"""
+    found = sum(1 for r in results if r['username'] not in ['NOT_FOUND', 'ERROR'])
+    not_found = sum(1 for r in results if r['username'] == 'NOT_FOUND')
+
+    print(f"\n✅ Summary:")
+    print(f"  Total processed: {len(results)}")
+    print(f"  Found: {found}")
+    print(f"  Not found: {not_found}")
+    print(f"  Timeline requests saved by memo: {TWEET_MEMO.hits}")
+    print(f"  Grok calls avoided by local matching: {sum(1 for r in results if r['source'] == 'local_match')}")
+
+    cache = get_client().cache
+    if cache is not None:
+        print(f"  X API cache hits: {cache.hits}, misses: {cache.misses}")
+
+    print(f"\n📁 Results saved to:")
+    for path in outputs or [OUTPUT_JSON, OUTPUT_CSV, MEMBERS_FILE]:
+        print(f"  - {path}")
+
+
+def finish_run(results: List[Dict], journal: Journal, shard: Optional[Shard] = None):
+    """
+    Compact the journal into the final JSON, CSV and members file
+    A shard keeps its journal instead: it is that shard's output until merge_shards runs
+    """
+    print("\n" + "-" * 60)
+    if shard:
+        journal.close()
+        # merge_shards takes a missing journal to mean the shard never finished
+        journal.touch()
+        print_summary(results, [journal.path])
+        print(f"\n🧩 Shard {shard[0]}/{shard[1]} done; run --merge-shards {shard[1]} once every shard has finished")
         return
 
-    if not XAI_API_KEY:
+    print(f"Writing results to {OUTPUT_JSON}, {OUTPUT_CSV} and {MEMBERS_FILE}...")
+    write_outputs(results)
+    journal.remove()
+    print_summary(results)
+
+
+def merge_shards(count: int) -> bool:
+    """
+    Combine the journals of a run split count ways into OUTPUT_JSON and
+    OUTPUT_CSV, in input order; incremental shards journal their carried rows too
+    """
+    print(f"Merging {count} shard journals into {OUTPUT_JSON}, {OUTPUT_CSV} and {MEMBERS_FILE}...")
+    journal_paths = shard_paths(JOURNAL_FILE, count)
+
+    missing_shards = [index for index, path in journal_paths.items() if not os.path.exists(path)]
+    if missing_shards:
+        print(f"❌ ERROR: No journal for shards {missing_shards} (expected e.g. {journal_paths[missing_shards[0]]})")
+        return False
+    for path in stray_shard_paths(JOURNAL_FILE, count):
+        print(f"  ⚠️ Ignoring {path}: not part of a {count}-way split")
+
+    names = load_names()
+    completed = {}
+    for path in journal_paths.values():
+        completed.update({r['original_name']: r for r in Journal(path).load()})
+
+    results = []
+    missing_names = []
+    for row in names:
+        parsed = parse_row(row)
+        if not parsed:
+            continue
+        name, existing_username = parsed
+        if name in completed:
+            results.append(completed[name])
+        elif existing_username:
+            # The async pipeline doesn't journal rows that came with a username
+            results.append(build_existing_result(name, existing_username))
+        else:
+            missing_names.append(name)
+
+    if missing_names:
+        print(f"❌ ERROR: {len(missing_names)} names have no result yet, e.g. {missing_names[:5]}")
+        print(f"   Re-run the unfinished shards (they resume from their journals), then merge again")
+        return False
+
+    write_outputs(results)
+    for path in journal_paths.values():
+        os.remove(path)
+    print_summary(results)
+    return True
+
+
+def use_credentials(credentials: Dict[str, str]):
+    """Point the shared X client (and Grok, if the set has a key) at one credential set"""
+    global XAI_API_KEY
+    configure_client(consumer_key=credentials['X_CONSUMER_KEY'],
+                     consumer_secret=credentials['X_CONSUMER_SECRET'],
+                     access_token=credentials['X_ACCESS_TOKEN'],
+                     access_token_secret=credentials['X_ACCESS_TOKEN_SECRET'])
+    if credentials.get('XAI_API_KEY'):
+        XAI_API_KEY = credentials['XAI_API_KEY']
+
+
+def credentials_configured() -> bool:
+    """Check X and Grok credentials, printing what is missing"""
+    if not get_client().can_request():
+        print("\n❌ ERROR: Please set OAuth 1.0a credentials in your .env.local file")
+        return False
+
+    if not grok_available():
         print("\n❌ ERROR: Please set XAI_API_KEY in your .env.local file")
+        return False
+
+    return True
+
+
+def match_name(name: str, top_k: int = TOP_K_TIMELINES) -> Dict:
+    """Search, match locally or with Grok, and build the result row for one name"""
+    # Step 1: Search X API for candidates
+    cleaned_name = clean_search_query(name)
+    print(f"  🔍 Searching X API for: {name}")
+    if cleaned_name != name:
+        print(f"      (cleaned to: {cleaned_name})")
+    search_results = search_x_users(name)
+
+    if search_results is None:
+        print(f"  ❌ Search failed")
+        return build_not_found_result(name, 'error')
+    if not search_results:
+        # A final answer, not a failure: nothing to retry
+        print(f"  ❌ No search results found")
+        return build_not_found_result(name, 'no_results')
+
+    print(f"  📋 Found {len(search_results)} candidates:")
+    for i, candidate in enumerate(search_results, 1):
+        print(f"      {i}. @{candidate.get('username')} - {candidate.get('name')}")
+
+    # Step 2: Skip timelines and Grok when one candidate clearly wins
+    best_match = local_match_user(name, search_results)
+
+    if not best_match:
+        # Step 3: Fetch tweets only for the top-k ranked candidates
+        search_results = rank_candidates(name, search_results)
+        print(f"  📝 Fetching recent tweets for the top {min(top_k, len(search_results))} candidates...")
+
+        for rank, candidate in enumerate(search_results):
+            if rank < top_k:
+                tweets = get_user_tweets_memoized(candidate.get('id'))
+                candidate['tweets'] = tweets if tweets else []
+            else:
+                candidate['tweets'] = []
+
+        # Step 4: Use Grok to intelligently match
+        print(f"  🤖 Using Grok AI to find best match...")
+        try:
+            best_match = grok_match_user(name, search_results)
+        except GrokError:
+            # Not a verdict on the name: keep it apart from no_match so it gets retried
+            return build_not_found_result(name, 'grok_error')
+
+    if best_match:
+        result = build_match_result(name, best_match)
+
+        print(f"  ✓ Matched: @{result['username']} (confidence: {best_match['confidence']})")
+        print(f"  💭 {best_match['reasoning']}")
+        print(f"  {json.dumps(result, indent=4)}")
+    else:
+        print(f"  ❌ No confident match found")
+        result = build_not_found_result(name, 'no_match')
+
+    return result
+
+
+def process_names(top_k: int = TOP_K_TIMELINES, shard: Optional[Shard] = None, incremental: bool = False):
+    """
+    Main processing loop; with shard=(i, n) only the rows of shard i are
+    processed, with incremental=True only rows without a usable previous result
+    """
+    print(f"Starting X Profile Scraper with Grok AI...")
+    print(f"Reading from: {INPUT_FILE}")
+    print(f"Output will be saved to: {OUTPUT_JSON}, {OUTPUT_CSV} and {MEMBERS_FILE}")
+    if shard:
+        print(f"Shard: {shard[0]}/{shard[1]}")
+    print("-" * 60)
+
+    if not credentials_configured():
         return
 
     results = []
+    journal = Journal(shard_path(JOURNAL_FILE, shard))
 
     try:
-        with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            names = list(reader)
+        names = select_shard(load_names(), shard)
+        completed = load_completed(journal)
+        if incremental:
+            completed = add_carried(completed, names, journal, shard)
 
         total = len(names)
         print(f"Found {total} names to process\n")
 
         for idx, row in enumerate(names, 1):
-            name = row.get('Name', '').strip()
-            title = row.get('Title', '').strip()
-
-            if not name or name == 'Name':  # Skip header
+            parsed = parse_row(row)
+            if not parsed:
                 continue
+            name, existing_username = parsed
 
-            # Extract existing username if present (e.g., "@alish2001_")
-            existing_username = None
-            if title.startswith('@'):
-                existing_username = title.replace('@', '')
+            if name in completed:
+                results.append(completed[name])
+                continue
 
             print(f"\n[{idx}/{total}] Processing: {name}")
 
             if existing_username:
-                result = {
-                    'original_name': name,
-                    'username': existing_username,
-                    'profile_url': f'https://x.com/{existing_username}',
-                    'confidence': 'existing',
-                    'source': 'existing'
-                }
+                result = build_existing_result(name, existing_username)
                 results.append(result)
                 print(f"  ✓ Found existing username: @{existing_username}")
                 print(f"  {json.dumps(result, indent=4)}")
 
                 # Save incrementally
-                save_results_incrementally(results)
+                journal.append(result)
                 continue
 
-            # Step 1: Search X API for candidates
-            cleaned_name = clean_search_query(name)
-            print(f"  🔍 Searching X API for: {name}")
-            if cleaned_name != name:
-                print(f"      (cleaned to: {cleaned_name})")
-            search_results = search_x_users(name)
-
-            if not search_results:
-                print(f"  ❌ No search results found")
-                result = {
-                    'original_name': name,
-                    'username': 'NOT_FOUND',
-                    'profile_url': '',
-                    'confidence': 'none',
-                    'source': 'error'
-                }
-                results.append(result)
-                save_results_incrementally(results)
-                time.sleep(RATE_LIMIT_DELAY)
-                continue
+            result = match_name(name, top_k)
+            results.append(result)
 
-            print(f"  📋 Found {len(search_results)} candidates:")
-            for i, candidate in enumerate(search_results, 1):
-                print(f"      {i}. @{candidate.get('username')} - {candidate.get('name')}")
+            # Save incrementally after each result
+            journal.append(result)
 
-            print(f"  📝 Fetching recent tweets for each candidate...")
+        finish_run(results, journal, shard)
 
-            # Step 2: Fetch tweets for each candidate
-            for candidate in search_results:
-                user_id = candidate.get('id')
-                tweets = get_user_tweets(user_id)
-                candidate['tweets'] = tweets if tweets else []
-                time.sleep(0.5)  # Small delay between tweet fetches
+    except FileNotFoundError:
+        print(f"❌ ERROR: Could not find {INPUT_FILE}")
+    except Exception as e:
+        print(f"❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        journal.close()
+        export_metrics(results, shard_path('', shard))
 
-            # Step 3: Use Grok to intelligently match
-            print(f"  🤖 Using Grok AI to find best match...")
-            best_match = grok_match_user(name, search_results)
 
-            if best_match:
-                user = best_match['user']
-                username = user.get('username')
-
-                result = {
-                    'original_name': name,
-                    'username': username,
-                    'full_name': user.get('name'),
-                    'profile_url': f'https://x.com/{username}',
-                    'verified': user.get('verified', False),
-                    'followers': user.get('public_metrics', {}).get('followers_count', 0),
-                    'confidence': best_match['confidence'],
-                    'reasoning': best_match['reasoning'],
-                    'source': 'grok_match'
-                }
-                results.append(result)
+class AsyncPipeline:
+    """
+    Staged async version of process_names
+    Search, tweet fetch and Grok matching each run in their own pool of
+    workers connected by queues, so a slow Grok call never blocks the next
+    search. The blocking X/Grok helpers run on a thread pool.
+    """
 
-                print(f"  ✓ Matched: @{username} (confidence: {best_match['confidence']})")
-                print(f"  💭 {best_match['reasoning']}")
-                print(f"  {json.dumps(result, indent=4)}")
+    def __init__(self, journal: Journal, completed: Optional[Dict[str, Dict]] = None,
+                 search_concurrency: int = SEARCH_CONCURRENCY,
+                 tweets_concurrency: int = TWEETS_CONCURRENCY,
+                 grok_concurrency: int = GROK_CONCURRENCY,
+                 top_k: int = TOP_K_TIMELINES,
+                 grok_batch_size: int = GROK_BATCH_SIZE):
+        self.journal = journal
+        self.completed = completed or {}
+        self.search_concurrency = search_concurrency
+        self.tweets_concurrency = tweets_concurrency
+        self.grok_concurrency = grok_concurrency
+        self.top_k = top_k
+        self.grok_batch_size = grok_batch_size
+        self.results: Dict[int, Dict] = {}
+        self.total = 0
+
+    def _finish(self, idx: int, result: Dict):
+        """Record a finished row and journal it"""
+        self.results[idx] = result
+        self.journal.append(result)
+        print(f"[{len(self.results)}/{self.total}] {result['original_name']} -> "
+              f"@{result['username']} ({result['source']})")
+
+    def ordered_results(self) -> List[Dict]:
+        return [self.results[idx] for idx in sorted(self.results)]
+
+    async def _search_worker(self, search_queue: asyncio.Queue, tweets_queue: asyncio.Queue):
+        while True:
+            idx, name = await search_queue.get()
+            try:
+                search_results = await asyncio.to_thread(search_x_users, name)
+                if search_results is None:
+                    self._finish(idx, build_not_found_result(name, 'error'))
+                    continue
+                if not search_results:
+                    self._finish(idx, build_not_found_result(name, 'no_results'))
+                    continue
+
+                local_match = local_match_user(name, search_results)
+                if local_match:
+                    self._finish(idx, build_match_result(name, local_match))
+                else:
+                    await tweets_queue.put((idx, name, search_results))
+            except Exception as e:
+                print(f"  ❌ Search failed for {name}: {e}")
+                self._finish(idx, build_not_found_result(name, 'error'))
+            finally:
+                search_queue.task_done()
+
+    async def _fetch_tweets(self, semaphore: asyncio.Semaphore, candidate: Dict):
+        async with semaphore:
+            tweets = await asyncio.to_thread(get_user_tweets_memoized, candidate.get('id'))
+        candidate['tweets'] = tweets if tweets else []
+
+    async def _tweets_worker(self, tweets_queue: asyncio.Queue, grok_queue: asyncio.Queue,
+                             semaphore: asyncio.Semaphore):
+        while True:
+            idx, name, candidates = await tweets_queue.get()
+            try:
+                candidates = rank_candidates(name, candidates)
+                for candidate in candidates[self.top_k:]:
+                    candidate['tweets'] = []
+                await asyncio.gather(*(self._fetch_tweets(semaphore, c) for c in candidates[:self.top_k]))
+                await grok_queue.put((idx, name, candidates))
+            except Exception as e:
+                print(f"  ❌ Tweet fetch failed for {name}: {e}")
+                self._finish(idx, build_not_found_result(name, 'error'))
+            finally:
+                tweets_queue.task_done()
+
+    async def _grok_worker(self, grok_queue: asyncio.Queue):
+        carry = None  # item that didn't fit the previous batch's prompt budget
+        while True:
+            item = carry or await grok_queue.get()
+            carry = None
+            batch = [item]
+            batch_tokens = estimate_tokens(build_candidates_context(item[1], item[2]))
+
+            # Linger briefly so names finishing their tweet stage can share the call
+            deadline = asyncio.get_running_loop().time() + GROK_BATCH_LINGER
+            while len(batch) < self.grok_batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    next_item = await asyncio.wait_for(grok_queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                next_tokens = estimate_tokens(build_candidates_context(next_item[1], next_item[2]))
+                if batch_tokens + next_tokens > GROK_BATCH_MAX_TOKENS:
+                    carry = next_item
+                    break
+                batch.append(next_item)
+                batch_tokens += next_tokens
+
+            try:
+                matches = await asyncio.to_thread(
+                    grok_match_batch, [(name, candidates) for _, name, candidates in batch]
+                )
+                for (idx, name, _), best_match in zip(batch, matches):
+                    if isinstance(best_match, GrokError):
+                        self._finish(idx, build_not_found_result(name, 'grok_error'))
+                    elif best_match:
+                        self._finish(idx, build_match_result(name, best_match))
+                    else:
+                        self._finish(idx, build_not_found_result(name, 'no_match'))
+            except Exception as e:
+                print(f"  ❌ Grok matching failed for {len(batch)} names: {e}")
+                for idx, name, _ in batch:
+                    if idx not in self.results:
+                        self._finish(idx, build_not_found_result(name, 'grok_error'))
+            finally:
+                for _ in batch:
+                    grok_queue.task_done()
+
+    async def run(self, names: List[Dict]) -> List[Dict]:
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(
+            max_workers=self.search_concurrency + self.tweets_concurrency + self.grok_concurrency
+        ))
+
+        search_queue: asyncio.Queue = asyncio.Queue()
+        tweets_queue: asyncio.Queue = asyncio.Queue()
+        grok_queue: asyncio.Queue = asyncio.Queue()
+        tweets_semaphore = asyncio.Semaphore(self.tweets_concurrency)
+
+        self.total = 0
+        for idx, row in enumerate(names, 1):
+            parsed = parse_row(row)
+            if not parsed:
+                continue
+            self.total += 1
+            name, existing_username = parsed
+            if name in self.completed:
+                self.results[idx] = self.completed[name]
+            elif existing_username:
+                self.results[idx] = build_existing_result(name, existing_username)
             else:
-                print(f"  ❌ No confident match found")
-                result = {
-                    'original_name': name,
-                    'username': 'NOT_FOUND',
-                    'profile_url': '',
-                    'confidence': 'none',
-                    'source': 'no_match'
-                }
-                results.append(result)
+                search_queue.put_nowait((idx, name))
+
+        workers = [asyncio.create_task(self._search_worker(search_queue, tweets_queue))
+                   for _ in range(self.search_concurrency)]
+        # One tweets worker per in-flight name; individual timeline calls share the semaphore
+        workers += [asyncio.create_task(self._tweets_worker(tweets_queue, grok_queue, tweets_semaphore))
+                    for _ in range(self.tweets_concurrency)]
+        workers += [asyncio.create_task(self._grok_worker(grok_queue))
+                    for _ in range(self.grok_concurrency)]
+
+        # Stages drain in order: a row only reaches the next queue after the previous one
+        await search_queue.join()
+        await tweets_queue.join()
+        await grok_queue.join()
+
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        return self.ordered_results()
+
+
+def process_names_async(search_concurrency: int = SEARCH_CONCURRENCY,
+                        tweets_concurrency: int = TWEETS_CONCURRENCY,
+                        grok_concurrency: int = GROK_CONCURRENCY,
+                        top_k: int = TOP_K_TIMELINES,
+                        grok_batch_size: int = GROK_BATCH_SIZE,
+                        shard: Optional[Shard] = None,
+                        incremental: bool = False):
+    """Async processing mode: same inputs and outputs as process_names"""
+    print(f"Starting X Profile Scraper with Grok AI (async pipeline)...")
+    print(f"Reading from: {INPUT_FILE}")
+    print(f"Output will be saved to: {OUTPUT_JSON}, {OUTPUT_CSV} and {MEMBERS_FILE}")
+    print(f"Concurrency: search={search_concurrency}, tweets={tweets_concurrency}, grok={grok_concurrency}")
+    if shard:
+        print(f"Shard: {shard[0]}/{shard[1]}")
+    print("-" * 60)
 
-            # Save incrementally after each result
-            save_results_incrementally(results)
+    if not credentials_configured():
+        return
 
-            # Rate limiting
-            time.sleep(RATE_LIMIT_DELAY)
+    GROK_LIMITER.set_maximum(grok_concurrency)
+    journal = Journal(shard_path(JOURNAL_FILE, shard))
+    results = []
+
+    try:
+        names = select_shard(load_names(), shard)
+        completed = load_completed(journal)
+        if incremental:
+            completed = add_carried(completed, names, journal, shard)
+        print(f"Found {len(names)} names to process\n")
+
+        pipeline = AsyncPipeline(journal, completed, search_concurrency, tweets_concurrency, grok_concurrency,
+                                 top_k=top_k, grok_batch_size=grok_batch_size)
+        results = asyncio.run(pipeline.run(names))
+
+        finish_run(results, journal, shard)
+
+    except FileNotFoundError:
+        print(f"❌ ERROR: Could not find {INPUT_FILE}")
+    except Exception as e:
+        print(f"❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        journal.close()
+        export_metrics(results, shard_path('', shard))
 
-        # Write final results to CSV
-        print("\n" + "-" * 60)
-        print(f"Writing results to {OUTPUT_CSV}...")
-
-        with open(OUTPUT_CSV, 'w', newline='', encoding='utf-8') as f:
-            fieldnames = ['original_name', 'username', 'full_name',
-                         'profile_url', 'verified', 'followers', 'confidence', 'reasoning', 'source']
-            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-            writer.writeheader()
-            writer.writerows(results)
-
-        # Summary
-        found = sum(1 for r in results if r['username'] not in ['NOT_FOUND', 'ERROR'])
-        not_found = sum(1 for r in results if r['username'] == 'NOT_FOUND')
-
-        print(f"\n✅ Summary:")
-        print(f"  Total processed: {len(results)}")
-        print(f"  Found: {found}")
-        print(f"  Not found: {not_found}")
-        print(f"\n📁 Results saved to:")
-        print(f"  - {OUTPUT_JSON}")
-        print(f"  - {OUTPUT_CSV}")
 
+def load_queue(queue_path: str = QUEUE_FILE, incremental: bool = False):
+    """
+    Enqueue the rows of INPUT_FILE; safe to re-run after appending rows,
+    rows already queued keep their state. In incremental mode carried-forward
+    rows are queued as done.
+    """
+    queue = WorkQueue(queue_path)
+    try:
+        names = load_names()
+        carried = load_carried(names) if incremental else {}
+        rows = []
+        done = {}
+        for idx, row in enumerate(names, 1):
+            parsed = parse_row(row)
+            if parsed:
+                rows.append((idx, *parsed))
+                if parsed[0] in carried:
+                    done[idx] = carried[parsed[0]]
+        added = queue.load(rows, done)
+        print(f"📥 Queued {added} new rows from {INPUT_FILE} into {queue_path} ({len(rows) - added} already queued)")
+        print_queue_status(queue)
     except FileNotFoundError:
         print(f"❌ ERROR: Could not find {INPUT_FILE}")
+    except ValueError as e:
+        print(f"❌ ERROR: {e}")
+    finally:
+        queue.close()
+
+
+def print_queue_status(queue: WorkQueue):
+    # Rows whose last lease ran out are otherwise only failed when a worker leases
+    queue.expire_leases()
+    counts = queue.counts()
+    print(f"  Queue: {', '.join(f'{state}={count}' for state, count in counts.items())}")
+
+
+def run_queue_worker(queue_path: str = QUEUE_FILE, top_k: int = TOP_K_TIMELINES,
+                     visibility_timeout: float = VISIBILITY_TIMEOUT):
+    """
+    Work-queue mode: lease rows one at a time until none are left
+    Any number of workers can share one queue file; a row whose worker dies
+    is picked up again once its lease expires
+    """
+    print(f"Starting X Profile Scraper with Grok AI (queue worker)...")
+    print(f"Queue: {queue_path}")
+    print("-" * 60)
+
+    if not credentials_configured():
+        return
+
+    queue = WorkQueue(queue_path, visibility_timeout=visibility_timeout)
+    results = []
+    print(f"Worker: {queue.owner}")
+
+    try:
+        while True:
+            items = queue.lease()
+            if not items:
+                wait = queue.next_available_in()
+                if wait is None:
+                    break
+                # Rows are backing off or leased by other workers
+                time.sleep(min(max(wait, 0.1), QUEUE_POLL_INTERVAL))
+                continue
+
+            item = items[0]
+            print(f"\n[row {item.position}] Processing: {item.name} (attempt {item.attempts})")
+            error = None
+            try:
+                if item.existing_username:
+                    result = build_existing_result(item.name, item.existing_username)
+                else:
+                    result = match_name(item.name, top_k)
+                if result['source'] == 'error':
+                    error = "Search failed"
+                elif result['source'] == 'grok_error':
+                    error = "Grok call failed"
+            except Exception as e:
+                result = build_not_found_result(item.name, 'error')
+                error = str(e)
+
+            if error is None:
+                queue.complete(item, result)
+                results.append(result)
+            elif queue.fail(item, error, result):
+                print(f"  🔁 Will retry {item.name} after a backoff: {error}")
+            else:
+                print(f"  ❌ Giving up on {item.name} after {item.attempts} attempts: {error}")
+                results.append(result)
+
+        print("\n" + "-" * 60)
+        print(f"✅ Queue drained; this worker finished {len(results)} rows")
+        print_queue_status(queue)
+        print(f"Run --queue export to write {OUTPUT_JSON}, {OUTPUT_CSV} and {MEMBERS_FILE}")
+
     except Exception as e:
         print(f"❌ ERROR: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        queue.close()
+        export_metrics(results, f".worker-{os.getpid()}")
+
+
+def open_existing_queue(queue_path: str) -> Optional[WorkQueue]:
+    """Open a queue written by --queue load; None (creating nothing) if the file is missing"""
+    if not os.path.exists(queue_path):
+        print(f"❌ ERROR: {queue_path} does not exist; run --queue load first")
+        return None
+    return WorkQueue(queue_path)
+
+
+def export_queue(queue_path: str = QUEUE_FILE) -> bool:
+    """Write the final outputs from a drained queue, in input order"""
+    queue = open_existing_queue(queue_path)
+    if queue is None:
+        return False
+    try:
+        print_queue_status(queue)
+        if not sum(queue.counts().values()):
+            print(f"❌ ERROR: {queue_path} has no rows; refusing to overwrite {OUTPUT_JSON}, {OUTPUT_CSV} "
+                  f"and {MEMBERS_FILE}")
+            return False
+        if not queue.is_finished():
+            print(f"❌ ERROR: {queue_path} still has pending or leased rows; run more workers first")
+            return False
+
+        results = queue.results(default=lambda name: build_not_found_result(name, 'error'))
+        write_outputs(results)
+
+        failures = queue.failures()
+        if failures:
+            print(f"\n⚠️ {len(failures)} rows failed every attempt:")
+            for name, attempts, error in failures:
+                print(f"  - {name} ({attempts} attempts): {error}")
+        print_summary(results)
+        return True
+    finally:
+        queue.close()
+
+
+def enable_response_cache(mode: str) -> ResponseCache:
+    """Attach the on-disk search/timeline cache to the shared X client"""
+    cache = ResponseCache(CACHE_TTLS, mode=mode)
+    get_client().cache = cache
+    print(f"X API cache: {cache.path} (mode: {mode})")
+    return cache
+
+
+def enable_cassette(path: str, mode: str) -> Cassette:
+    """Record X and Grok traffic to a cassette, or replay it without network or credentials"""
+    global _cassette
+    _cassette = open_cassette(path, mode)
+    get_client().cassette = _cassette
+    return _cassette
+
+
+def run_local_shards(count: int, argv: List[str]) -> bool:
+    """Run count shard processes of this script side by side, then merge their journals"""
+    print(f"Launching {count} shard processes...")
+    processes = [subprocess.Popen([sys.executable, os.path.abspath(__file__), *argv, '--shard', f'{i}/{count}'],
+                                  stdout=subprocess.DEVNULL)
+                 for i in range(1, count + 1)]
+
+    failed = [i for i, process in enumerate(processes, 1) if process.wait() != 0]
+    if failed:
+        print(f"❌ ERROR: Shards {failed} exited with an error")
+        return False
+    return merge_shards(count)
+
+
+def strip_option(argv: List[str], option: str) -> List[str]:
+    """Drop '--option value' / '--option=value' from an argument list"""
+    stripped = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg == option:
+            skip = True
+        elif not arg.startswith(option + '='):
+            stripped.append(arg)
+    return stripped
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="X Profile Scraper with Grok AI")
+    parser.add_argument('--async', dest='async_mode', action='store_true',
+                        help="Run search, tweet fetch and Grok matching as concurrent stages")
+    parser.add_argument('--search-concurrency', type=int, default=SEARCH_CONCURRENCY)
+    parser.add_argument('--tweets-concurrency', type=int, default=TWEETS_CONCURRENCY)
+    parser.add_argument('--grok-concurrency', type=int, default=GROK_CONCURRENCY,
+                        help="Most Grok calls in flight; the adaptive limit starts lower and grows to this")
+    parser.add_argument('--top-k', type=int, default=TOP_K_TIMELINES,
+                        help="Fetch timelines only for this many top-ranked candidates per name")
+    parser.add_argument('--grok-batch-size', type=int, default=GROK_BATCH_SIZE,
+                        help="Names resolved per Grok call in --async mode (1 disables batching)")
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument('--cache-only', action='store_true',
+                             help="Serve X search/timeline calls from the cache only, never the network")
+    cache_group.add_argument('--refresh', action='store_true',
+                             help="Ignore cached X responses and overwrite them")
+    cache_group.add_argument('--no-cache', action='store_true',
+                             help="Disable the X response cache")
+    shard_group = parser.add_mutually_exclusive_group()
+    shard_group.add_argument('--shard', type=parse_shard, metavar='I/N',
+                             help="Process only shard I of N (stable hash of the name), journaling to its own file")
+    shard_group.add_argument('--merge-shards', type=int, metavar='N',
+                             help="Merge the journals of an N-way sharded run into the final JSON and CSV")
+    shard_group.add_argument('--local-shards', type=int, metavar='N',
+                             help="Run N shard processes on this machine, then merge them")
+    parser.add_argument('--queue', choices=['load', 'work', 'status', 'export'],
+                        help="Work-queue mode: load names.txt into the queue, run a worker, show progress, "
+                             "or write the final JSON and CSV")
+    parser.add_argument('--queue-file', default=QUEUE_FILE, help="SQLite queue shared by the workers")
+    parser.add_argument('--visibility-timeout', type=float, default=VISIBILITY_TIMEOUT,
+                        help="Seconds before a leased row is handed to another worker")
+    parser.add_argument('--incremental', action='store_true',
+                        help=f"Reuse {OUTPUT_JSON} and only process new, not-found, low-confidence or stale rows")
+    parser.add_argument('--credentials-pool', metavar='FILE',
+                        help="JSON list of X (and optionally xAI) credential sets, assigned to shards round-robin")
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument('--record', metavar='FILE',
+                                help="Record every X response and Grok answer to a gzip JSONL cassette")
+    cassette_group.add_argument('--replay', metavar='FILE',
+                                help="Serve X and Grok calls from a recorded cassette, with no network or credentials")
+    return parser.parse_args()
 
 
 if __name__ == '__main__':
-    process_names()
+    args = parse_args()
+    if args.merge_shards:
+        sys.exit(0 if merge_shards(args.merge_shards) else 1)
+    if args.local_shards:
+        sys.exit(0 if run_local_shards(args.local_shards, strip_option(sys.argv[1:], '--local-shards')) else 1)
+
+    if args.queue == 'load':
+        load_queue(args.queue_file, args.incremental)
+        sys.exit(0)
+    if args.queue == 'status':
+        queue = open_existing_queue(args.queue_file)
+        if queue is None:
+            sys.exit(1)
+        print_queue_status(queue)
+        queue.close()
+        sys.exit(0)
+    if args.queue == 'export':
+        sys.exit(0 if export_queue(args.queue_file) else 1)
+
+    if args.credentials_pool:
+        use_credentials(credentials_for_shard(load_credential_pool(args.credentials_pool), args.shard))
+
+    if not args.no_cache:
+        if args.cache_only:
+            enable_response_cache(MODE_CACHE_ONLY)
+        elif args.refresh:
+            enable_response_cache(MODE_REFRESH)
+        else:
+            enable_response_cache(MODE_NORMAL)
+
+    if args.record:
+        # Shard processes run side by side, so each records its own cassette
+        enable_cassette(shard_path(args.record, args.shard), MODE_RECORD)
+    elif args.replay:
+        enable_cassette(args.replay, MODE_REPLAY)
+
+    if args.queue == 'work':
+        run_queue_worker(args.queue_file, top_k=args.top_k, visibility_timeout=args.visibility_timeout)
+    elif args.async_mode:
+        process_names_async(args.search_concurrency, args.tweets_concurrency, args.grok_concurrency,
+                            top_k=args.top_k, grok_batch_size=args.grok_batch_size, shard=args.shard,
+                            incremental=args.incremental)
+    else:
+        process_names(top_k=args.top_k, shard=args.shard, incremental=args.incremental)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+hackathon_members.json entries
+Shared by main.py, which builds them from the search payload in the same
+pass, and fetch_profile_pics.py, which fills in rows that have no image yet
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+from journal import write_json_atomic
+
+MEMBERS_FILE = 'hackathon_members.json'
+DEFAULT_PROFILE_IMAGE_URL = "https://abs.twimg.com/sticky/default_profile_images/default_profile_400x400.png"
+MIRROR_FIELDS = ('local_image_path', 'thumbnail_paths')  # written by mirror_images.py
+
+
+def upgrade_profile_image_url(profile_image_url: str) -> str:
+    """
+    X API returns profile images in low resolution (_normal),
+    we can get higher resolution by replacing _normal with _400x400
+    """
+    if profile_image_url and '_normal' in profile_image_url:
+        return profile_image_url.replace('_normal', '_400x400')
+    return profile_image_url
+
+
+def has_valid_username(profile: Dict) -> bool:
+    username = profile.get('username')
+    return bool(username) and username not in ['NOT_FOUND', 'ERROR']
+
+
+def build_member(profile: Dict, profile_image_url: Optional[str]) -> Dict:
+    """Create a hackathon member entry, falling back to the default X avatar"""
+    return {
+        'username': profile.get('username'),
+        'full_name': profile.get('full_name', profile.get('original_name', '')),
+        'profile_url': profile.get('profile_url', ''),
+        'profile_image_url': profile_image_url or DEFAULT_PROFILE_IMAGE_URL
+    }
+
+
+def load_members(path: str = MEMBERS_FILE) -> Dict[str, Dict]:
+    """Existing members keyed by lowercased username ({} if the file doesn't exist yet)"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return {m['username'].lower(): m for m in json.load(f) if m.get('username')}
+
+
+def members_from_results(results: List[Dict], previous: Optional[Dict[str, Dict]] = None) -> List[Dict]:
+    """
+    Members for every matched result row, using the image URL kept from the
+    search; rows without one reuse a previous member's image if there is one
+    """
+    previous = previous or {}
+    members = []
+    for result in results:
+        if not has_valid_username(result):
+            continue
+        profile_image_url = result.get('profile_image_url')
+        if not profile_image_url:
+            old = previous.get(result['username'].lower())
+            if old and old.get('profile_image_url') != DEFAULT_PROFILE_IMAGE_URL:
+                profile_image_url = old.get('profile_image_url')
+        members.append(build_member(result, profile_image_url))
+    return members
+
+
+def carry_mirror_fields(members: List[Dict], previous: Dict[str, Dict]) -> List[Dict]:
+    """
+    Keep the local image paths mirror_images.py added to previous members
+    whose profile_image_url is unchanged; a changed image needs mirroring again
+    """
+    for member in members:
+        old = previous.get((member.get('username') or '').lower())
+        if old and old.get('profile_image_url') == member.get('profile_image_url'):
+            for field in MIRROR_FIELDS:
+                if field in old and field not in member:
+                    member[field] = old[field]
+    return members
+
+
+def save_members(members: List[Dict], path: str = MEMBERS_FILE):
+    """Write the members file, carrying over mirrored image paths from the one it replaces"""
+    write_json_atomic(path, carry_mirror_fields(members, load_members(path)))
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Run metrics for the scraper scripts
+Counters, gauges and latency histograms with labels, exported at the end of
+a run as a Prometheus text file and a JSON summary for run-to-run comparison
+"""
+
+import functools
+import json
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+PREFIX = 'scraper_'
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+TOKEN_BUCKETS = [250, 500, 750, 1000, 1500, 2000, 3000, 5000, 7500, 10000, 15000, 20000]
+# Histograms that aren't latencies in seconds; everything else uses LATENCY_BUCKETS
+HISTOGRAM_BUCKETS = {
+    'prompt_tokens': TOKEN_BUCKETS,
+}
+MAX_SAMPLES = 10000  # per histogram series, reservoir-sampled for the JSON percentiles
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: str = '') -> str:
+    parts = [f'{k}="{v}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class Histogram:
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.samples: List[float] = []
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+        self.count += 1
+        self.sum += value
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(value)
+        else:
+            slot = random.randrange(self.count)
+            if slot < MAX_SAMPLES:
+                self.samples[slot] = value
+
+
+class MetricsRegistry:
+    """Thread-safe metric store; metric names are given without PREFIX"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.started_at = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            key = _label_key(labels)
+            if key not in series:
+                series[key] = Histogram(HISTOGRAM_BUCKETS.get(name, LATENCY_BUCKETS))
+            series[key].observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, stage: str):
+        """Decorator recording a function's duration in stage_seconds{stage=...}"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer('stage_seconds', stage=stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            self.gauges.setdefault('run_seconds', {})[()] = time.time() - self.started_at
+
+            for name, series in sorted(self.counters.items()):
+                lines.append(f'# TYPE {PREFIX}{name} counter')
+                for key, value in sorted(series.items()):
+                    lines.append(f'{PREFIX}{name}{_format_labels(key)} {value:g}')
+
+            for name, series in sorted(self.gauges.items()):
+                lines.append(f'# TYPE {PREFIX}{name} gauge')
+                for key, value in sorted(series.items()):
+                    lines.append(f'{PREFIX}{name}{_format_labels(key)} {value:g}')
+
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f'# TYPE {PREFIX}{name} histogram')
+                for key, hist in sorted(series.items()):
+                    bounds = [f'{bound:g}' for bound in hist.buckets] + ['+Inf']
+                    for bound, count in zip(bounds, hist.bucket_counts + [hist.count]):
+                        le = 'le="' + bound + '"'
+                        lines.append(f'{PREFIX}{name}_bucket{_format_labels(key, le)} {count}')
+                    lines.append(f'{PREFIX}{name}_sum{_format_labels(key)} {hist.sum:g}')
+                    lines.append(f'{PREFIX}{name}_count{_format_labels(key)} {hist.count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def to_summary(self) -> Dict:
+        def series_name(name: str, key: LabelKey) -> str:
+            return name + _format_labels(key)
+
+        with self._lock:
+            return {
+                'run_seconds': time.time() - self.started_at,
+                'counters': {series_name(n, k): v for n, s in sorted(self.counters.items())
+                             for k, v in sorted(s.items())},
+                'gauges': {series_name(n, k): v for n, s in sorted(self.gauges.items())
+                           for k, v in sorted(s.items())},
+                'histograms': {
+                    series_name(n, k): {'count': h.count, 'sum': h.sum,
+                                        'p50': percentile(h.samples, 50), 'p99': percentile(h.samples, 99)}
+                    for n, s in sorted(self.histograms.items()) for k, h in sorted(s.items())
+                },
+            }
+
+    def export(self, prometheus_path: str, json_path: str):
+        """Write the Prometheus text file and the JSON summary"""
+        with open(prometheus_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_summary(), f, indent=2)
+        print(f"📈 Metrics saved to: {prometheus_path}, {json_path}")
+
+
+METRICS = MetricsRegistry()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Mirror member profile images locally
+Downloads every profile_image_url in hackathon_members.json concurrently
+into a content-addressed store, revalidates with ETag / If-Modified-Since
+on later runs, makes small WebP/AVIF thumbnails (needs Pillow) and writes
+the local paths next to profile_image_url. main.py and fetch_profile_pics.py
+keep those paths for members whose image is unchanged; run this again after
+them to mirror new or changed images
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from journal import write_json_atomic
+from members import MEMBERS_FILE
+from metrics import METRICS
+from rate_limiter import RateLimiter, get_with_retries
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+else:
+    try:
+        import pillow_avif  # noqa: F401  (registers AVIF on Pillow builds without it)
+    except ImportError:
+        pass
+
+INPUT_FILE = MEMBERS_FILE
+PUBLIC_DIR = '../public'  # served by the Next.js app at /
+STORE_DIR = '../public/profile_images'
+URL_PREFIX = '/profile_images'  # how the front end reaches STORE_DIR
+MANIFEST_FILE = 'manifest.json'  # inside STORE_DIR: validators and hashes per source URL
+DOWNLOAD_CONCURRENCY = 16
+CONNECT_TIMEOUT = 5.0  # seconds
+READ_TIMEOUT = 30.0  # seconds
+THUMBNAIL_SIZE = 96  # px, square; the member pills render at 32-48px
+THUMBNAIL_FORMATS = ['webp', 'avif']
+METRICS_PROM_FILE = 'mirror_images_metrics.prom'
+METRICS_JSON_FILE = 'mirror_images_metrics.json'
+
+CONTENT_TYPE_EXTENSIONS = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+}
+
+# Image hosts don't send x-rate-limit headers; this only backs off on 429/5xx
+LIMITER = RateLimiter()
+
+
+def extension_for(response: requests.Response, url: str) -> str:
+    content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+    if content_type in CONTENT_TYPE_EXTENSIONS:
+        return CONTENT_TYPE_EXTENSIONS[content_type]
+    ext = os.path.splitext(url.split('?')[0])[1].lstrip('.').lower()
+    return ext or 'img'
+
+
+def object_path(digest: str, ext: str) -> str:
+    """Store-relative path of an image: objects/ab/abcdef....jpg"""
+    return f"objects/{digest[:2]}/{digest}.{ext}"
+
+
+def thumbnail_path(digest: str, fmt: str) -> str:
+    return f"thumbs/{digest[:2]}/{digest}_{THUMBNAIL_SIZE}.{fmt}"
+
+
+def thumbnail_formats() -> List[str]:
+    """Formats this Pillow build can write"""
+    if Image is None:
+        return []
+    Image.init()
+    return [fmt for fmt in THUMBNAIL_FORMATS if fmt.upper() in Image.SAVE]
+
+
+def write_file(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Two URLs can serve the same bytes, so threads may write the same path at once
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def make_thumbnails(store_dir: str, digest: str, data: bytes, formats: List[str]) -> Dict[str, str]:
+    """Write missing thumbnails for an image; returns {format: store-relative path}"""
+    paths = {fmt: thumbnail_path(digest, fmt) for fmt in formats}
+    todo = [fmt for fmt, path in paths.items() if not os.path.exists(os.path.join(store_dir, path))]
+    if todo:
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+                image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+                for fmt in todo:
+                    buffer = io.BytesIO()
+                    image.save(buffer, format=fmt.upper(), quality=80)
+                    write_file(os.path.join(store_dir, paths[fmt]), buffer.getvalue())
+                    METRICS.inc('thumbnails_total', format=fmt)
+        except Exception as e:
+            print(f"  ⚠️ Could not make thumbnails for {digest[:12]}: {e}")
+            return {}
+    return paths
+
+
+class ImageMirror:
+    """Content-addressed image store with a manifest of HTTP validators per source URL"""
+
+    def __init__(self, store_dir: str = STORE_DIR, concurrency: int = DOWNLOAD_CONCURRENCY,
+                 formats: Optional[List[str]] = None):
+        self.store_dir = store_dir
+        self.concurrency = concurrency
+        self.formats = thumbnail_formats() if formats is None else formats
+        self.manifest_path = os.path.join(store_dir, MANIFEST_FILE)
+        self.manifest: Dict[str, Dict] = {}
+        self.counts: Counter = Counter()  # downloaded / not_modified / error
+        self._counts_lock = threading.Lock()
+        # The manifest is written even if every download fails
+        os.makedirs(store_dir, exist_ok=True)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _count(self, result: str):
+        METRICS.inc('images_total', result=result)
+        with self._counts_lock:
+            self.counts[result] += 1
+
+    def _stored(self, entry: Optional[Dict]) -> bool:
+        return bool(entry) and os.path.exists(os.path.join(self.store_dir, entry['path']))
+
+    @METRICS.timed('image_download')
+    def fetch(self, url: str) -> Optional[Dict]:
+        """Download or revalidate one URL; returns its manifest entry, or None if it can't be had"""
+        try:
+            return self._fetch(url)
+        except Exception as e:
+            # One bad image (disk error, odd response) mustn't abort the whole mirror
+            print(f"  ❌ {url}: {type(e).__name__}: {e}")
+            self._count('error')
+            entry = self.manifest.get(url)
+            return entry if self._stored(entry) else None
+
+    def _fetch(self, url: str) -> Optional[Dict]:
+        entry = self.manifest.get(url)
+        headers = {}
+        if self._stored(entry):
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            response = get_with_retries(url, 'profile_images', limiter=LIMITER, session=self.session,
+                                        headers=headers, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        except requests.RequestException as e:
+            print(f"  ❌ {url}: {e}")
+            self._count('error')
+            return entry if self._stored(entry) else None
+
+        if response.status_code == 304 and self._stored(entry):
+            self._count('not_modified')
+            data = None
+        elif response.status_code == 200:
+            data = response.content
+            digest = hashlib.sha256(data).hexdigest()
+            path = object_path(digest, extension_for(response, url))
+            if not os.path.exists(os.path.join(self.store_dir, path)):
+                write_file(os.path.join(self.store_dir, path), data)
+                METRICS.inc('bytes_written_total', len(data), file='profile_images')
+            entry = {'sha256': digest, 'path': path}
+            self._count('downloaded')
+        else:
+            print(f"  ❌ Error {response.status_code} for {url}")
+            self._count('error')
+            return entry if self._stored(entry) else None
+
+        entry = dict(entry, etag=response.headers.get('ETag', entry.get('etag')),
+                     last_modified=response.headers.get('Last-Modified', entry.get('last_modified')))
+
+        missing_thumbnails = any(fmt not in entry.get('thumbnails', {}) for fmt in self.formats)
+        if self.formats and (data is not None or missing_thumbnails):
+            if data is None:
+                with open(os.path.join(self.store_dir, entry['path']), 'rb') as f:
+                    data = f.read()
+            entry['thumbnails'] = make_thumbnails(self.store_dir, entry['sha256'], data, self.formats)
+        return entry
+
+    def mirror(self, urls: List[str]) -> Dict[str, Optional[Dict]]:
+        """Fetch every distinct URL concurrently; the manifest is saved afterwards"""
+        unique = list(dict.fromkeys(u for u in urls if u))
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            entries = dict(zip(unique, executor.map(self.fetch, unique)))
+
+        for url, entry in entries.items():
+            if entry:
+                self.manifest[url] = entry
+        write_json_atomic(self.manifest_path, self.manifest)
+        return entries
+
+    def close(self):
+        self.session.close()
+
+
+def local_fields(entry: Optional[Dict], url_prefix: str) -> Dict:
+    """Member fields pointing the front end at the mirrored image and thumbnails"""
+    if not entry:
+        return {'local_image_path': None, 'thumbnail_paths': {}}
+    prefix = url_prefix.rstrip('/')
+    return {
+        'local_image_path': f"{prefix}/{entry['path']}",
+        'thumbnail_paths': {fmt: f"{prefix}/{path}" for fmt, path in entry.get('thumbnails', {}).items()},
+    }
+
+
+def served_dir(url_prefix: str) -> Optional[str]:
+    """Directory the Next.js app serves url_prefix from, or None for a full URL (another host)"""
+    if not url_prefix.startswith('/'):
+        return None
+    return os.path.join(PUBLIC_DIR, url_prefix.strip('/'))
+
+
+def mirror_members(store_dir: str = STORE_DIR, url_prefix: str = URL_PREFIX,
+                   concurrency: int = DOWNLOAD_CONCURRENCY):
+    """Mirror every member image and write the local paths back into INPUT_FILE"""
+    expected = served_dir(url_prefix)
+    if expected and os.path.abspath(store_dir) != os.path.abspath(expected):
+        # The member paths would point at files the front end doesn't serve
+        print(f"❌ ERROR: {url_prefix} is served from {expected}, not {store_dir}; "
+              f"pass --store-dir {expected} or a --url-prefix that serves {store_dir}")
+        return
+
+    print(f"Starting profile image mirror...")
+    print(f"Reading from: {INPUT_FILE}")
+    print(f"Store: {store_dir} (served as {url_prefix})")
+    print("-" * 60)
+
+    mirror = None
+    try:
+        with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+            members = json.load(f)
+
+        mirror = ImageMirror(store_dir, concurrency)
+        if Image is None:
+            print("⚠️ Pillow is not installed; skipping thumbnails (pip install Pillow)")
+        else:
+            print(f"Thumbnails: {', '.join(mirror.formats) or 'none (no WebP/AVIF support in this Pillow)'}")
+
+        urls = [m.get('profile_image_url') for m in members]
+        print(f"Found {len(members)} members, {len(set(filter(None, urls)))} distinct images\n")
+        entries = mirror.mirror(urls)
+
+        for member in members:
+            member.update(local_fields(entries.get(member.get('profile_image_url')), url_prefix))
+        write_json_atomic(INPUT_FILE, members)
+
+        print("\n" + "-" * 60)
+        print(f"✅ Summary:")
+        print(f"  Downloaded: {mirror.counts['downloaded']}")
+        print(f"  Not modified: {mirror.counts['not_modified']}")
+        print(f"  Failed: {mirror.counts['error']}")
+        print(f"  Members without a local image: {sum(1 for m in members if not m['local_image_path'])}")
+        print(f"\n📁 Results saved to: {INPUT_FILE}, {store_dir}")
+
+    except FileNotFoundError:
+        print(f"❌ ERROR: Could not find {INPUT_FILE}")
+    except json.JSONDecodeError as e:
+        print(f"❌ ERROR: Invalid JSON in {INPUT_FILE}: {e}")
+    except Exception as e:
+        print(f"❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        if mirror is not None:
+            mirror.close()
+        METRICS.export(METRICS_PROM_FILE, METRICS_JSON_FILE)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mirror member profile images locally with thumbnails")
+    parser.add_argument('--store-dir', default=STORE_DIR,
+                        help="Content-addressed image store; must be where --url-prefix is served from")
+    parser.add_argument('--url-prefix', default=URL_PREFIX,
+                        help=f"URL the front end serves the store under: a path under {PUBLIC_DIR}, or a full URL")
+    parser.add_argument('--concurrency', type=int, default=DOWNLOAD_CONCURRENCY)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    mirror_members(args.store_dir, args.url_prefix, args.concurrency)
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Offline stand-ins for the X API and Grok
+Serves /2/users/search, /2/users/{id}/tweets, /2/users/by/username/{} and
+/2/users/by with deterministic fake users, configurable latency, 429
+injection and x-rate-limit-* headers, plus a fake Grok structured-output
+endpoint. FakeGrokClient mirrors the xai_sdk chat surface used by main.py
+(chat.create / append / parse) on top of that endpoint.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from cassette import message_text
+
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Priya', 'Wei', 'Maria', 'Omar', 'Lena', 'Kenji']
+LAST_NAMES = ['Smith', 'Chen', 'Patel', 'Garcia', 'Kim', 'Nguyen', 'Singh', 'Lopez', 'Park', 'Ali']
+BIOS = ['engineer building at the xAI hackathon', 'ML researcher', 'founder, building things',
+        'coffee and cats', 'sports fan', 'student, cs', 'photographer', '']
+
+GROK_PARSE_PATH = '/v1/grok/parse'
+
+
+class MockConfig:
+    """Knobs shared by every request the mock server handles"""
+
+    def __init__(self, x_latency: float = 0.05, grok_latency: float = 0.5, jitter: float = 0.2,
+                 error_rate: float = 0.0, rate_limit: int = 100000, window: float = 900.0,
+                 ambiguity: float = 0.3, seed: int = 0):
+        self.x_latency = x_latency  # mean seconds per X call
+        self.grok_latency = grok_latency  # mean seconds per Grok call
+        self.jitter = jitter  # +/- fraction of the mean
+        self.error_rate = error_rate  # fraction of calls answered with an injected 429
+        self.rate_limit = rate_limit  # requests per endpoint per window
+        self.window = window  # rate-limit window in seconds
+        self.ambiguity = ambiguity  # fraction of names with a same-name decoy candidate
+        self.seed = seed
+
+
+def _rng(*parts) -> random.Random:
+    """Deterministic RNG per (seed, key) so repeated calls return the same data"""
+    digest = hashlib.sha256('|'.join(map(str, parts)).encode('utf-8')).hexdigest()
+    return random.Random(int(digest[:16], 16))
+
+
+def _user_id(username: str) -> str:
+    return str(int(hashlib.sha256(username.lower().encode('utf-8')).hexdigest()[:15], 16))
+
+
+def fake_user(username: str, name: str, description: str, rng: random.Random) -> Dict:
+    return {
+        'id': _user_id(username),
+        'username': username,
+        'name': name,
+        'description': description,
+        'verified': rng.random() < 0.2,
+        'verified_type': 'none',
+        'created_at': '2015-01-01T00:00:00.000Z',
+        'profile_image_url': f'https://pbs.twimg.com/profile_images/{_user_id(username)}/avatar_normal.jpg',
+        'public_metrics': {'followers_count': int(rng.paretovariate(1.2) * 50)},
+    }
+
+
+def fake_search_results(query: str, max_results: int, config: MockConfig) -> List[Dict]:
+    """The real person plus decoys; some names get a same-name decoy to stay ambiguous"""
+    rng = _rng(config.seed, 'search', query.lower())
+    handle = re.sub(r'[^a-z0-9_]', '', query.lower())[:12] or 'user'
+
+    users = [fake_user(handle, query, rng.choice(BIOS[:3]), rng)]
+    if rng.random() < config.ambiguity:
+        users.append(fake_user(f'{handle}_{rng.randint(10, 99)}', query, rng.choice(BIOS[3:]), rng))
+
+    while len(users) < max_results:
+        name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+        username = re.sub(r'[^a-z0-9_]', '', name.lower()) + str(rng.randint(1, 9999))
+        users.append(fake_user(username, name, rng.choice(BIOS), rng))
+
+    rng.shuffle(users)
+    return users[:max_results]
+
+
+def fake_tweets(user_id: str, max_results: int, config: MockConfig) -> List[Dict]:
+    rng = _rng(config.seed, 'tweets', user_id)
+    topics = ['shipping a new demo', 'at the xAI hackathon', 'grok is fast', 'weekend hike', 'new blog post']
+    return [
+        {'id': str(rng.randint(10 ** 17, 10 ** 18)), 'text': f'{rng.choice(topics)} #{i}',
+         'created_at': '2025-11-01T00:00:00.000Z', 'public_metrics': {'like_count': rng.randint(0, 100)}}
+        for i in range(max_results)
+    ]
+
+
+def fake_grok_answer(prompt: str, schema: str) -> Dict:
+    """
+    Pick, per query in the prompt, the candidate whose full name matches best
+    Mirrors the structure main.build_candidates_context produces
+    """
+    blocks = re.split(r'=== Query (\d+) ===', prompt)
+    if len(blocks) == 1:
+        queries = [(1, prompt)]
+    else:
+        queries = [(int(blocks[i]), blocks[i + 1]) for i in range(1, len(blocks), 2)]
+
+    matches = []
+    for query_id, text in queries:
+        query = re.search(r'Original search query: (.*)', text)
+        query_name = re.sub(r'\([^)]*\)', '', query.group(1)).strip().lower() if query else ''
+        candidates = re.findall(r'Username: @(\S+)\n\s+Full Name: (.*)', text)
+        best = max(candidates, key=lambda c: (c[1].strip().lower() == query_name, -len(c[0])),
+                   default=('unknown', ''))
+        matches.append({
+            'query_id': query_id,
+            'matched_username': best[0],
+            'confidence': 'high' if best[1].strip().lower() == query_name else 'low',
+            'reasoning': 'Mock Grok: best full-name match',
+        })
+
+    if schema == 'BatchMatchResult':
+        return {'matches': matches}
+    return {k: v for k, v in matches[0].items() if k != 'query_id'}
+
+
+class MockState:
+    """Per-endpoint request counts and rate-limit windows"""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.requests: Counter = Counter()
+        self.injected_429s = 0
+        self._windows: Dict[str, List[float]] = {}  # endpoint -> [window_start, used]
+        self._lock = threading.Lock()
+
+    def take(self, endpoint: str):
+        """Count a request; returns (allowed, limit, remaining, reset)"""
+        with self._lock:
+            self.requests[endpoint] += 1
+            now = time.time()
+            window = self._windows.get(endpoint)
+            if window is None or now >= window[0] + self.config.window:
+                window = self._windows[endpoint] = [now, 0]
+            window[1] += 1
+            remaining = max(0, self.config.rate_limit - int(window[1]))
+            reset = int(window[0] + self.config.window) + 1
+            return window[1] <= self.config.rate_limit, self.config.rate_limit, remaining, reset
+
+
+def make_handler(state: MockState):
+    config = state.config
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True  # avoid delayed-ACK stalls on keep-alive connections
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: Dict, headers: Optional[Dict] = None):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, str(value))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _sleep(self, mean: float):
+            time.sleep(max(0.0, mean * (1 + random.uniform(-config.jitter, config.jitter))))
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+            if url.path == '/2/users/search':
+                endpoint = 'users/search'
+            elif re.fullmatch(r'/2/users/\d+/tweets', url.path):
+                endpoint = 'users/tweets'
+            elif url.path.startswith('/2/users/by/username/'):
+                endpoint = 'users/by/username'
+            elif url.path == '/2/users/by':
+                endpoint = 'users/by'
+            else:
+                self._send(404, {'title': 'Not Found'})
+                return
+
+            self._sleep(config.x_latency)
+            allowed, limit, remaining, reset = state.take(endpoint)
+            headers = {'x-rate-limit-limit': limit, 'x-rate-limit-remaining': remaining,
+                       'x-rate-limit-reset': reset}
+
+            if allowed and random.random() < config.error_rate:
+                state.injected_429s += 1
+                allowed = False
+                headers['x-rate-limit-remaining'] = 0
+                headers['x-rate-limit-reset'] = int(time.time()) + 1
+            if not allowed:
+                self._send(429, {'title': 'Too Many Requests'}, headers)
+                return
+
+            if endpoint == 'users/search':
+                body = {'data': fake_search_results(params.get('query', ''),
+                                                    int(params.get('max_results', 10)), config)}
+            elif endpoint == 'users/tweets':
+                body = {'data': fake_tweets(url.path.split('/')[3], int(params.get('max_results', 10)), config)}
+            elif endpoint == 'users/by/username':
+                username = url.path.rsplit('/', 1)[1]
+                body = {'data': fake_user(username, username, '', _rng(config.seed, username))}
+            else:
+                body = {'data': [], 'errors': []}
+                for username in params.get('usernames', '').split(','):
+                    if username.lower().startswith('suspended'):
+                        body['errors'].append({'value': username, 'detail': f'User has been suspended: [{username}].'})
+                    elif username:
+                        body['data'].append(fake_user(username, username, '', _rng(config.seed, username)))
+
+            self._send(200, body, headers)
+
+        def do_POST(self):
+            if urlparse(self.path).path != GROK_PARSE_PATH:
+                self._send(404, {'title': 'Not Found'})
+                return
+
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            self._sleep(config.grok_latency)
+            with state._lock:
+                state.requests['grok'] += 1
+
+            if random.random() < config.error_rate:
+                state.injected_429s += 1
+                self._send(429, {'error': 'Too Many Requests'})
+                return
+
+            self._send(200, fake_grok_answer(request.get('prompt', ''), request.get('schema', '')))
+
+    return Handler
+
+
+class MockServer:
+    """Mock X + Grok server on a background thread"""
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = '127.0.0.1', port: int = 0):
+        self.config = config or MockConfig()
+        self.state = MockState(self.config)
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(self.state))
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'MockServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class FakeGrokError(Exception):
+    """Raised by FakeChat.parse for non-200 answers, like the SDK's RPC errors"""
+
+
+class FakeChat:
+    def __init__(self, base_url: str, session: requests.Session):
+        self.base_url = base_url
+        self.session = session
+        self.messages: List[str] = []
+
+    def append(self, message):
+        self.messages.append(message_text(message))
+        return self
+
+    def parse(self, schema):
+        response = self.session.post(f'{self.base_url}{GROK_PARSE_PATH}', json={
+            'schema': schema.__name__, 'prompt': self.messages[-1] if self.messages else ''
+        })
+        if response.status_code != 200:
+            raise FakeGrokError(f'{response.status_code}: {response.text}')
+        return response, schema.model_validate(response.json())
+
+
+class FakeChatFactory:
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.session = requests.Session()
+
+    def create(self, model: str, **kwargs) -> FakeChat:
+        return FakeChat(self.base_url, self.session)
+
+
+class FakeGrokClient:
+    """Drop-in for xai_sdk.Client as used by main.py, backed by the mock server"""
+
+    def __init__(self, base_url: str):
+        self.chat = FakeChatFactory(base_url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the mock X API + Grok server")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--x-latency', type=float, default=0.05)
+    parser.add_argument('--grok-latency', type=float, default=0.5)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=100000)
+    parser.add_argument('--window', type=float, default=900.0)
+    args = parser.parse_args()
+
+    config = MockConfig(x_latency=args.x_latency, grok_latency=args.grok_latency, error_rate=args.error_rate,
+                        rate_limit=args.rate_limit, window=args.window)
+    server = MockServer(config, port=args.port).start()
+    print(f"Mock X API + Grok listening on {server.url} (set X_API_BASE_URL={server.url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Token-budgeted candidate context for Grok
+Drops retweets, URLs and duplicate text, always keeps every candidate's
+identity line, and shares what is left of the budget across bios and
+tweets by rank, so prompt size no longer depends on how chatty the
+candidates are
+"""
+
+import math
+import re
+from typing import Dict, List, NamedTuple
+
+CHARS_PER_TOKEN = 4  # rough average for English text with the Grok tokenizer
+PROMPT_TOKEN_BUDGET = 1200  # per query, including the fixed per-candidate lines
+MAX_TWEETS_PER_CANDIDATE = 5  # main.py fetches this many per timeline (also the API minimum)
+MAX_TWEET_CHARS = 150
+MAX_BIO_CHARS = 300
+MIN_SNIPPET_CHARS = 40  # don't add a bio or tweet cut shorter than this
+TWEET_LINE_OVERHEAD = len("    - \n")
+BLOCK_OVERHEAD = len("  Bio: No bio\n  Recent tweets: None available\n\n")
+RANK_DECAY = 0.6  # candidate at rank r gets RANK_DECAY ** r of the top candidate's share
+
+URL_PATTERN = re.compile(r'https?://\S+|\bt\.co/\S+|\bwww\.\S+')
+RETWEET_PATTERN = re.compile(r'^RT @\w+:?')
+
+
+class Prompt(NamedTuple):
+    text: str
+    estimated_tokens: int
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def clean_text(text: str) -> str:
+    """Drop URLs and collapse whitespace"""
+    return ' '.join(URL_PATTERN.sub(' ', text or '').split())
+
+
+def dedupe_key(text: str) -> str:
+    return re.sub(r'[^a-z0-9]', '', text.lower())
+
+
+def truncate(text: str, max_chars: int) -> str:
+    """Cut at a word boundary, marking the cut with an ellipsis"""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars - 1].rsplit(' ', 1)[0] if ' ' in text[:max_chars - 1] else text[:max_chars - 1]
+    return cut + '…'
+
+
+def candidate_snippets(candidates: List[Dict]) -> List[List[str]]:
+    """
+    Bio followed by usable tweets for each candidate, with retweets, URLs,
+    empty text and anything already seen (for any candidate) removed
+    """
+    seen = set()
+    snippets = []
+    for candidate in candidates:
+        texts = [('bio', clean_text(candidate.get('description', '')))]
+        for tweet in candidate.get('tweets', []):
+            text = tweet.get('text', '')
+            if not RETWEET_PATTERN.match(text):
+                texts.append(('tweet', clean_text(text)))
+
+        kept = []
+        tweets_kept = 0
+        for kind, text in texts:
+            key = dedupe_key(text)
+            if not key or key in seen:
+                if kind == 'bio':
+                    kept.append('')
+                continue
+            if kind == 'tweet':
+                if tweets_kept >= MAX_TWEETS_PER_CANDIDATE:
+                    break
+                tweets_kept += 1
+            seen.add(key)
+            kept.append(truncate(text, MAX_BIO_CHARS if kind == 'bio' else MAX_TWEET_CHARS))
+        snippets.append(kept)
+    return snippets
+
+
+def fit(text: str, budget: int) -> str:
+    """text, cut to budget chars, or '' if that would leave too little of it"""
+    if len(text) <= budget:
+        return text
+    if budget < MIN_SNIPPET_CHARS:
+        return ''
+    return truncate(text, budget)
+
+
+def build_prompt(original_name: str, candidates: List[Dict], token_budget: int = PROMPT_TOKEN_BUDGET) -> Prompt:
+    """
+    Describe a query and its candidates (best ranked first) within token_budget
+    The identity lines of every candidate are always included; bios and
+    tweets fill the rest, the higher-ranked candidates getting more room
+    """
+    header = f"Original search query: {original_name}\n\nCandidate users:\n\n"
+    identities = []
+    for idx, candidate in enumerate(candidates, 1):
+        identities.append(
+            f"Candidate {idx}:\n"
+            f"  Username: @{candidate.get('username')}\n"
+            f"  Full Name: {candidate.get('name')}\n"
+            f"  Verified: {candidate.get('verified', False)}\n"
+            f"  Followers: {candidate.get('public_metrics', {}).get('followers_count', 0)}\n"
+        )
+
+    snippets = candidate_snippets(candidates)
+    fixed_chars = len(header) + sum(len(i) + BLOCK_OVERHEAD for i in identities)
+    remaining = max(0, token_budget * CHARS_PER_TOKEN - fixed_chars)
+
+    weights = [RANK_DECAY ** rank for rank in range(len(candidates))]
+    blocks = []
+    for rank, (identity, texts) in enumerate(zip(identities, snippets)):
+        # This candidate's share of what is left; unused room flows to the next ranks
+        share = int(remaining * weights[rank] / sum(weights[rank:])) if remaining else 0
+        used = 0
+
+        bio = fit(texts[0], share) if texts else ''
+        used += len(bio)
+        lines = [f"  Bio: {bio or 'No bio'}\n"]
+
+        tweet_lines = []
+        for text in texts[1:]:
+            tweet = fit(text, share - used - TWEET_LINE_OVERHEAD)
+            if not tweet:
+                break
+            tweet_lines.append(f"    - {tweet}\n")
+            used += len(tweet) + TWEET_LINE_OVERHEAD
+        if tweet_lines:
+            lines.append("  Recent tweets:\n")
+            lines.extend(tweet_lines)
+        else:
+            lines.append("  Recent tweets: None available\n")
+
+        remaining -= used
+        blocks.append(identity + ''.join(lines) + "\n")
+
+    text = header + ''.join(blocks)
+    return Prompt(text, estimate_tokens(text))
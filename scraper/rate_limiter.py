@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Header-driven rate limiting for the X API
+Tracks the x-rate-limit-* headers per endpoint so callers run at full speed while
+quota remains and only wait until the real reset time once it is used up
+"""
+
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+
+from metrics import METRICS
+
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0  # seconds, doubled on every retry
+BACKOFF_CAP = 60.0  # never wait longer than this between retries (unless X says so)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Capped exponential backoff with full jitter"""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+class EndpointBucket:
+    """Quota state for one endpoint, as last reported by X"""
+
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0  # unix time the current window ends
+
+
+class RateLimiter:
+    """
+    Per-endpoint token bucket fed by x-rate-limit-limit / -remaining / -reset
+    Thread-safe, so the async pipeline's worker threads can share one instance
+    """
+
+    def __init__(self):
+        self._buckets: Dict[str, EndpointBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, endpoint: str) -> EndpointBucket:
+        bucket = self._buckets.get(endpoint)
+        if bucket is None:
+            bucket = self._buckets[endpoint] = EndpointBucket()
+        return bucket
+
+    def acquire(self, endpoint: str):
+        """Take one request token, sleeping until the window resets if none are left"""
+        while True:
+            with self._lock:
+                bucket = self._bucket(endpoint)
+                now = time.time()
+
+                if bucket.remaining is None or bucket.remaining > 0:
+                    if bucket.remaining is not None:
+                        bucket.remaining -= 1
+                    return
+
+                if now >= bucket.reset_at:
+                    # Window rolled over: refill locally until headers say otherwise
+                    bucket.remaining = (bucket.limit - 1) if bucket.limit else None
+                    return
+
+                wait = bucket.reset_at - now
+
+            print(f"  ⏳ Rate limit reached for {endpoint}, waiting {wait:.0f}s until reset...")
+            METRICS.observe('rate_limit_wait_seconds', wait, endpoint=endpoint)
+            time.sleep(wait)
+
+    def update(self, endpoint: str, response: requests.Response):
+        """Record the quota headers from a response"""
+        headers = response.headers
+        try:
+            limit = int(headers['x-rate-limit-limit']) if 'x-rate-limit-limit' in headers else None
+            remaining = int(headers['x-rate-limit-remaining']) if 'x-rate-limit-remaining' in headers else None
+            reset_at = float(headers['x-rate-limit-reset']) if 'x-rate-limit-reset' in headers else None
+        except ValueError:
+            return
+
+        with self._lock:
+            bucket = self._bucket(endpoint)
+            if limit is not None:
+                bucket.limit = limit
+            if reset_at is not None and reset_at > bucket.reset_at:
+                # New window: trust the server count
+                bucket.reset_at = reset_at
+                bucket.remaining = remaining
+            elif remaining is not None:
+                # Same window: responses can arrive out of order, keep the lowest count
+                bucket.remaining = remaining if bucket.remaining is None else min(bucket.remaining, remaining)
+
+    def block(self, endpoint: str, response: requests.Response, attempt: int):
+        """
+        Mark an endpoint exhausted after a 429
+        Uses x-rate-limit-reset when present, otherwise capped exponential backoff
+        """
+        self.update(endpoint, response)
+        try:
+            reset_at = float(response.headers.get('x-rate-limit-reset', ''))
+        except ValueError:
+            reset_at = None
+
+        with self._lock:
+            bucket = self._bucket(endpoint)
+            bucket.remaining = 0
+            # The 429's own reset wins over anything recorded earlier
+            if reset_at is not None and reset_at > time.time():
+                bucket.reset_at = reset_at
+            else:
+                bucket.reset_at = time.time() + backoff_delay(attempt)
+
+
+LIMITER = RateLimiter()
+
+
+def get_with_retries(url: str, endpoint: str, limiter: RateLimiter = LIMITER,
+                     max_retries: int = MAX_RETRIES, session=requests, **kwargs) -> requests.Response:
+    """
+    GET through the rate limiter, retrying 429s, 5xx and connection errors
+    Returns the last response once retries run out; raises the last
+    requests exception if every attempt failed to connect
+    """
+    for attempt in range(max_retries + 1):
+        limiter.acquire(endpoint)
+
+        try:
+            response = session.get(url, **kwargs)
+        except requests.RequestException:
+            if attempt == max_retries:
+                METRICS.inc('x_errors_total', endpoint=endpoint, reason='connection')
+                raise
+            METRICS.inc('x_retries_total', endpoint=endpoint, reason='connection')
+            time.sleep(backoff_delay(attempt))
+            continue
+
+        limiter.update(endpoint, response)
+        METRICS.inc('x_requests_total', endpoint=endpoint, status=response.status_code)
+
+        if attempt == max_retries:
+            break
+
+        if response.status_code == 429:
+            print(f"  ⚠️ Rate limit hit for {endpoint} (attempt {attempt + 1}/{max_retries + 1})")
+            METRICS.inc('x_retries_total', endpoint=endpoint, reason='429')
+            limiter.block(endpoint, response, attempt)
+            continue
+
+        if response.status_code >= 500:
+            METRICS.inc('x_retries_total', endpoint=endpoint, reason='5xx')
+            time.sleep(backoff_delay(attempt))
+            continue
+
+        break
+
+    if response.status_code >= 400:
+        METRICS.inc('x_errors_total', endpoint=endpoint, reason=response.status_code)
+    return response
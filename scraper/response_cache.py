@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Persistent SQLite cache for X API responses
+Keyed by endpoint and normalized parameters, with a TTL per endpoint and
+size-bounded eviction, so re-runs (e.g. after a prompt tweak) reuse the
+search and timeline responses instead of spending quota
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+CACHE_FILE = 'x_api_cache.sqlite3'
+MAX_CACHE_ENTRIES = 50000
+EVICTION_CHECK_EVERY = 100  # inserts between size checks
+
+# Cache modes
+MODE_NORMAL = 'normal'  # serve fresh hits, fetch and store misses
+MODE_REFRESH = 'refresh'  # always fetch, overwrite the cache
+MODE_CACHE_ONLY = 'cache-only'  # never touch the network, misses fail
+
+
+class CachedResponse:
+    """Minimal stand-in for requests.Response built from a cache row"""
+
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+        self.headers: Dict[str, str] = {}
+        self.latency = 0.0
+        self.from_cache = True
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def normalize_params(params: Optional[Dict]) -> Dict[str, str]:
+    """
+    Canonical form of request parameters
+    Field lists are order-insensitive and search queries case-insensitive on X
+    """
+    normalized = {}
+    for key, value in (params or {}).items():
+        value = str(value).strip()
+        if key.endswith('.fields') or key == 'usernames':
+            value = ','.join(sorted(v.strip() for v in value.split(',')))
+        elif key == 'query':
+            value = ' '.join(value.lower().split())
+        normalized[key] = value
+    return normalized
+
+
+class ResponseCache:
+    """
+    SQLite-backed response cache
+    Only endpoints listed in ttls are cached; thread-safe via one shared
+    connection guarded by a lock
+    """
+
+    def __init__(self, ttls: Dict[str, float], path: str = CACHE_FILE,
+                 max_entries: int = MAX_CACHE_ENTRIES, mode: str = MODE_NORMAL):
+        self.ttls = ttls
+        self.path = path
+        self.max_entries = max_entries
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._inserts = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                status_code INTEGER NOT NULL,
+                body TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)')
+        self._conn.commit()
+
+    def handles(self, endpoint: str) -> bool:
+        return endpoint in self.ttls
+
+    @staticmethod
+    def make_key(endpoint: str, url: str, params: Optional[Dict]) -> str:
+        payload = json.dumps([endpoint, url, normalize_params(params)], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, endpoint: str, url: str, params: Optional[Dict]) -> Optional[CachedResponse]:
+        """Fresh cached response, or None on miss / expiry / refresh mode"""
+        if self.mode == MODE_REFRESH:
+            return None
+
+        key = self.make_key(endpoint, url, params)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT status_code, body, created_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.ttls[endpoint]:
+                self.misses += 1
+                return None
+            self._conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (now, key))
+            self._conn.commit()
+            self.hits += 1
+
+        return CachedResponse(row[0], row[1])
+
+    def put(self, endpoint: str, url: str, params: Optional[Dict], status_code: int, body: str):
+        key = self.make_key(endpoint, url, params)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                (key, endpoint, status_code, body, now, now)
+            )
+            self._conn.commit()
+            self._inserts += 1
+            if self._inserts % EVICTION_CHECK_EVERY == 0:
+                self._evict()
+
+    def _evict(self):
+        """Drop expired rows, then least recently used rows beyond max_entries"""
+        now = time.time()
+        for endpoint, ttl in self.ttls.items():
+            self._conn.execute(
+                'DELETE FROM responses WHERE endpoint = ? AND created_at < ?', (endpoint, now - ttl)
+            )
+        count = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                'DELETE FROM responses WHERE key IN '
+                '(SELECT key FROM responses ORDER BY last_access LIMIT ?)',
+                (count - self.max_entries,)
+            )
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Static sharding for multi-process / multi-machine runs
+Rows are assigned to shards by a stable hash of the name, so every process
+agrees on the split without coordinating; each shard journals to its own
+file and a merge step puts the results back in input order
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+Shard = Tuple[int, int]  # (index, count), index is 1-based like "--shard 2/4"
+
+CREDENTIAL_KEYS = ['X_CONSUMER_KEY', 'X_CONSUMER_SECRET', 'X_ACCESS_TOKEN', 'X_ACCESS_TOKEN_SECRET']
+
+
+def parse_shard(value: str) -> Shard:
+    """Parse 'i/n' (1 <= i <= n)"""
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d+)\s*', value)
+    if not match:
+        raise ValueError(f"Shard must look like i/n, got {value!r}")
+    index, count = int(match.group(1)), int(match.group(2))
+    if not 1 <= index <= count:
+        raise ValueError(f"Shard index must be between 1 and {count}, got {index}")
+    return index, count
+
+
+def shard_of(name: str, count: int) -> int:
+    """1-based shard for a name; stable across processes, machines and Python versions"""
+    key = ' '.join(name.lower().split()).encode('utf-8')
+    return int(hashlib.sha256(key).hexdigest()[:16], 16) % count + 1
+
+
+def in_shard(name: str, shard: Optional[Shard]) -> bool:
+    return shard is None or shard_of(name, shard[1]) == shard[0]
+
+
+def shard_path(path: str, shard: Optional[Shard]) -> str:
+    """'x_profiles_found.jsonl' -> 'x_profiles_found.shard-2-of-4.jsonl'"""
+    if shard is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard-{shard[0]}-of-{shard[1]}{ext}"
+
+
+def shard_paths(path: str, count: int) -> Dict[int, str]:
+    """Every shard's file for a run split count ways, keyed by shard index"""
+    return {index: shard_path(path, (index, count)) for index in range(1, count + 1)}
+
+
+def stray_shard_paths(path: str, count: int) -> List[str]:
+    """Shard files left over from a run split a different number of ways"""
+    root, ext = os.path.splitext(path)
+    expected = set(shard_paths(path, count).values())
+    return sorted(p for p in glob.glob(f"{root}.shard-*-of-*{ext}") if p not in expected)
+
+
+def load_credential_pool(path: str) -> List[Dict[str, str]]:
+    """
+    Read a JSON list of credential sets, one per X app/account:
+    [{"X_CONSUMER_KEY": ..., "X_CONSUMER_SECRET": ..., "X_ACCESS_TOKEN": ...,
+      "X_ACCESS_TOKEN_SECRET": ..., "XAI_API_KEY": ... (optional)}, ...]
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        pool = json.load(f)
+
+    if not isinstance(pool, list) or not pool:
+        raise ValueError(f"{path} must contain a non-empty JSON list of credential sets")
+    for i, credentials in enumerate(pool, 1):
+        missing = [key for key in CREDENTIAL_KEYS if not credentials.get(key)]
+        if missing:
+            raise ValueError(f"Credential set {i} in {path} is missing {', '.join(missing)}")
+    return pool
+
+
+def credentials_for_shard(pool: List[Dict[str, str]], shard: Optional[Shard]) -> Dict[str, str]:
+    """Shards take credential sets round-robin, so n shards over m sets share evenly"""
+    index = shard[0] if shard else 1
+    return pool[(index - 1) % len(pool)]
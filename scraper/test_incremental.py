@@ -0,0 +1,41 @@
+"""Handoff from main.py's members output to fetch_profile_pics.py --incremental"""
+
+import json
+
+from incremental import ResultIndex, timestamp
+from members import DEFAULT_PROFILE_IMAGE_URL, members_from_results, save_members
+
+
+def write_main_outputs(tmp_path, results):
+    """What main.py writes: the results JSON, then the members file built from it"""
+    results_path = tmp_path / 'x_profiles_found.json'
+    members_path = tmp_path / 'hackathon_members.json'
+    results_path.write_text(json.dumps(results), encoding='utf-8')
+    save_members(members_from_results(results), str(members_path))
+    return ResultIndex(str(results_path), str(members_path))
+
+
+def result(username, profile_image_url=None):
+    return {
+        'original_name': username.title(),
+        'username': username,
+        'full_name': username.title(),
+        'profile_url': f'https://x.com/{username}',
+        'profile_image_url': profile_image_url,
+        'processed_at': timestamp(),
+    }
+
+
+def test_member_with_search_image_is_carried(tmp_path):
+    row = result('alice', 'https://pbs.twimg.com/alice_400x400.jpg')
+    index = write_main_outputs(tmp_path, [row])
+
+    assert index.current_member(row)['profile_image_url'] == row['profile_image_url']
+
+
+def test_placeholder_member_is_looked_up_again(tmp_path):
+    row = result('bob')
+    index = write_main_outputs(tmp_path, [row])
+
+    assert index.by_username['bob']['profile_image_url'] == DEFAULT_PROFILE_IMAGE_URL
+    assert index.current_member(row) is None
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Content-addressed disk cache for synthesized audio.
+
+Responses are keyed by a hash of everything that determines the output:
+endpoint, model, text or script, voice identity (a hash of the reference
+audio, or the stock voice id), instructions and sampling params including
+the seed. Only seeded requests are cached; without a seed the endpoint
+samples a different take every time. The cache is bounded in size and
+evicts the least recently used entries first.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+CACHE_DIR = os.environ.get("TTS_CACHE_DIR", "tts_cache")
+MAX_CACHE_BYTES = int(os.environ.get("TTS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+INLINE_AUDIO_FIELDS = ("audio", "voice")  # may hold base64 reference audio
+
+
+def voice_identity(value):
+    """Base64 reference audio becomes its content hash; stock voice ids and None stay as they are"""
+    if isinstance(value, str) and len(value) > 256:
+        return "sha256:" + hashlib.sha256(value.encode("utf-8")).hexdigest()
+    return value
+
+
+def canonical(payload):
+    """The payload with inline audio replaced by its hash, so keys are cheap to log and compare"""
+    if isinstance(payload, dict):
+        return {
+            key: voice_identity(value) if key in INLINE_AUDIO_FIELDS else canonical(value)
+            for key, value in payload.items()
+        }
+    if isinstance(payload, list):
+        return [canonical(value) for value in payload]
+    return payload
+
+
+def cache_key(endpoint: str, payload: dict) -> str | None:
+    """Key for a request payload, or None if it isn't seeded (and so not reproducible)"""
+    if (payload.get("sampling_params") or {}).get("seed") is None:
+        return None
+    blob = json.dumps([endpoint, canonical(payload)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """
+    One file per entry under cache_dir, named by key. A hit refreshes the
+    file's mtime, and a write evicts by oldest mtime until the total size
+    fits, so several processes can share the directory
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def path(self, key: str, extension: str = "mp3") -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{extension}")
+
+    def get(self, key: str | None, extension: str = "mp3") -> bytes | None:
+        if key is None:
+            return None
+        path = self.path(key, extension)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def put(self, key: str | None, data: bytes, extension: str = "mp3"):
+        if key is None or len(data) > self.max_bytes:
+            return
+        path = self.path(key, extension)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def entries(self) -> list[tuple[float, int, str]]:
+        """(mtime, size, path) of every cached file"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+AUDIO_CACHE = AudioCache()
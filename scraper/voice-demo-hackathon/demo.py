@@ -6,21 +6,131 @@ This script demonstrates POST methods for generating
 speech from text using the TTS API.
 """
 
-import base64
+import re
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 import os
 
+from audio_cache import AUDIO_CACHE, cache_key
+from mp3_frames import concat_mp3
+from voice_registry import VOICES
+
 API_KEY = os.environ.get("XAI_API_KEY")
 BASE_URL = "https://us-east-4.api.x.ai/voice-staging"
 ENDPOINT = f"{BASE_URL}/api/v1/text-to-speech/generate"
 
 MAX_INPUT_LENGTH = 4096
 MAX_PROMPT_LENGTH = 4096
+TTS_CONCURRENCY = 4  # chunk requests in flight for long texts
+SEED = 191119  # fixed seed: the same request gives the same audio, so it can be cached
+CHUNK_TIMEOUT = (10, 300)  # seconds to connect, and between bytes of a chunk's audio
+
+SENTENCE_END = re.compile(r"(?:(?<=[.!?…])|(?<=[.!?…][\"')\]]))\s+")
 
 
 def file_to_base64(file_path: str) -> str:
-    with open(file_path, "rb") as file:
-        return base64.b64encode(file.read()).decode("utf-8")
+    return VOICES.get(file_path)
+
+
+def split_text(text: str, max_length: int = MAX_INPUT_LENGTH) -> list[str]:
+    """
+    Split text into chunks of at most max_length characters on sentence
+    boundaries, falling back to word boundaries (and then a hard cut) for
+    sentences that are longer than that on their own
+    """
+    pieces = []
+    for sentence in SENTENCE_END.split(text.strip()):
+        while len(sentence) > max_length:
+            cut = sentence.rfind(" ", 0, max_length + 1)
+            cut = cut if cut > 0 else max_length
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if sentence:
+            pieces.append(sentence)
+
+    chunks = []
+    for piece in pieces:
+        if chunks and len(chunks[-1]) + 1 + len(piece) <= max_length:
+            chunks[-1] += " " + piece
+        else:
+            chunks.append(piece)
+    return chunks
+
+
+def build_payload(input_text: str, vibe: str, voice_base64: str | None) -> dict:
+    return {
+        "model": "grok-voice",
+        "input": input_text,
+        "response_format": "mp3",
+        "instructions": vibe,
+        "voice": voice_base64 or "None",
+        "sampling_params": {
+            "max_new_tokens": 512,
+            "temperature": 1.0,
+            "min_p": 0.01,
+            "seed": SEED,
+        },
+    }
+
+
+def synthesize_chunk(
+    session: requests.Session, index: int, input_text: str, vibe: str, voice_base64: str | None
+) -> bytes:
+    payload = build_payload(input_text, vibe, voice_base64)
+    key = cache_key(ENDPOINT, payload)
+    cached = AUDIO_CACHE.get(key)
+    if cached is not None:
+        print(f"♻️ Chunk {index + 1}: cached")
+        return cached
+
+    print(f"🔊 Chunk {index + 1}: {len(input_text)} characters")
+    response = session.post(
+        ENDPOINT, json=payload, headers={"Authorization": f"Bearer {API_KEY}"}, timeout=CHUNK_TIMEOUT
+    )
+    if response.status_code != 200:
+        raise RuntimeError(f"Chunk {index + 1} failed: {response.status_code} - {response.text}")
+    AUDIO_CACHE.put(key, response.content)
+    return response.content
+
+
+def tts_long_request(
+    input_text: str,
+    prompt: str = "",
+    vibe: str = "audio",
+    voice_file: str | None = None,
+    output_file: str = "output.mp3",
+    concurrency: int = TTS_CONCURRENCY,
+):
+    """
+    Text-to-speech for inputs longer than MAX_INPUT_LENGTH.
+
+    The text is split on sentence boundaries, the chunks are synthesized in
+    parallel (at most `concurrency` at a time) and their MP3 frames are
+    joined in order into one file, without decoding or re-encoding.
+    """
+    voice_base64 = file_to_base64(voice_file) if voice_file is not None else None
+    prompt = prompt[:MAX_PROMPT_LENGTH]
+    chunks = split_text(input_text)
+    print(f"Synthesizing {len(input_text)} characters as {len(chunks)} chunks, {concurrency} at a time")
+
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(synthesize_chunk, session, index, chunk, vibe, voice_base64)
+            for index, chunk in enumerate(chunks)
+        ]
+        try:
+            parts = [future.result() for future in futures]
+        except (RuntimeError, requests.RequestException) as e:
+            for future in futures:
+                future.cancel()
+            print(f"❌ Error: {e}")
+            return None
+
+    with open(output_file, "wb") as f:
+        f.write(concat_mp3(parts))
+    print(f"✅ Audio saved to {output_file}")
+    return output_file
 
 
 def tts_request(
@@ -33,26 +143,25 @@ def tts_request(
 
     print(f"API_KEY={API_KEY}")
 
+    if len(input_text) > MAX_INPUT_LENGTH:
+        return tts_long_request(input_text, prompt, vibe, voice_file, output_file)
+
     if voice_file is not None:
         voice_base64 = file_to_base64(voice_file)
     else:
         voice_base64 = None
 
-    input_text = input_text[:MAX_INPUT_LENGTH]
     prompt = prompt[:MAX_PROMPT_LENGTH]
 
-    payload = {
-        "model": "grok-voice",
-        "input": input_text,
-        "response_format": "mp3",
-        "instructions": vibe,
-        "voice": voice_base64 or "None",
-        "sampling_params": {
-            "max_new_tokens": 512,
-            "temperature": 1.0,
-            "min_p": 0.01,
-        },
-    }
+    payload = build_payload(input_text, vibe, voice_base64)
+
+    key = cache_key(ENDPOINT, payload)
+    cached = AUDIO_CACHE.get(key)
+    if cached is not None:
+        with open(output_file, "wb") as f:
+            f.write(cached)
+        print(f"♻️ Reused cached audio ({key[:12]}), saved to {output_file}")
+        return output_file
 
     print(f"Making POST request to {ENDPOINT}")
     print(f"Payload: {payload}")
@@ -60,9 +169,12 @@ def tts_request(
     response = requests.post(ENDPOINT, json=payload, stream=True, headers={"Authorization": f"Bearer {API_KEY}"})
 
     if response.status_code == 200:
+        audio = bytearray()
         with open(output_file, "wb") as f:
             for chunk in response.iter_content(chunk_size=8192):
                 f.write(chunk)
+                audio += chunk
+        AUDIO_CACHE.put(key, bytes(audio))
         print(f"✅ Audio saved to {output_file}")
         return output_file
     else:
@@ -94,6 +206,15 @@ def main():
         vibe="black american male, aged 60-65",
     )
 
+    print("\n📝 Example 2: Long text, synthesized in parallel chunks")
+    print("-" * 60)
+    tts_request(
+        input_text=" ".join(
+            f"This is sentence {i} of a long article that does not fit in a single request." for i in range(1, 121)
+        ),
+        output_file="example2_long.mp3",
+    )
+
 
 if __name__ == "__main__":
     try:
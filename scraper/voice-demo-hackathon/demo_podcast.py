@@ -5,12 +5,17 @@ Demo script for calling the Podcast API endpoints.
 This script demonstrates POST methods for generating a podcast using the Podcast API.
 """
 
-import base64
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 import os
 
+from audio_cache import AUDIO_CACHE, cache_key
+from mp3_frames import concat_mp3
+from streaming_body import podcast_body
+from voice_registry import VOICES
+
 load_dotenv('/Users/advaitpaliwal/Projects/xpert/.env.local')
 
 class SamplingParams(BaseModel):
@@ -59,25 +64,138 @@ ENDPOINT = f"{BASE_URL}/api/v1/text-to-speech/generate-podcast"
 
 MAX_INPUT_LENGTH = 4096
 MAX_PROMPT_LENGTH = 4096
+MAX_INSTRUCTIONS_LENGTH = 16000  # Speaker.instructions limit
+SEGMENT_TURNS = 12  # longer MP3 scripts are rendered as segments by long_podcast_request
+PODCAST_CONCURRENCY = 4  # segment requests in flight
+PODCAST_TIMEOUT = (10, 300)  # seconds to connect, and between bytes of a segment's audio
 
 
 def file_to_base64(file_path: str) -> str:
-    with open(file_path, "rb") as file:
-        return base64.b64encode(file.read()).decode("utf-8")
+    return VOICES.get(file_path)
+
 
+def render_podcast(model: GeneratePodcastModel, audio_paths: dict[str, str] | None = None) -> bytes | None:
+    """
+    Audio for a podcast request, from the cache or the endpoint; None on error.
 
-def podcast_request(model: GeneratePodcastModel, output_file: str = "output.mp3"):
+    Speakers listed in audio_paths (speaker id -> reference clip) get their
+    audio streamed from the file into the request body instead of being
+    held in memory as base64.
+    """
+    audio_paths = audio_paths or {}
     payload = model.model_dump()
 
-    response = requests.post(ENDPOINT, json=payload, stream=True, headers={"Authorization": f"Bearer {API_KEY}"})
+    key_payload = model.model_dump()
+    for speaker in key_payload["speakers"]:
+        if speaker["id"] in audio_paths:
+            speaker["audio"] = VOICES.identity(audio_paths[speaker["id"]])
+    key = cache_key(ENDPOINT, key_payload)
+    cached = AUDIO_CACHE.get(key, model.response_format)
+    if cached is not None:
+        print(f"♻️ Reused cached audio ({key[:12]})")
+        return cached
+
+    try:
+        response = requests.post(
+            ENDPOINT,
+            data=podcast_body(payload, audio_paths),
+            stream=True,
+            headers={"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"},
+            timeout=PODCAST_TIMEOUT,
+        )
+
+        if response.status_code != 200:
+            print(f"❌ Error: {response.status_code} - {response.text}")
+            return None
 
-    if response.status_code == 200:
+        audio = bytearray()
+        for chunk in response.iter_content(chunk_size=8192):
+            audio += chunk
+    except requests.RequestException as e:
+        print(f"❌ Error: {e}")
+        return None
+    AUDIO_CACHE.put(key, bytes(audio), model.response_format)
+    return bytes(audio)
+
+
+def podcast_request(
+    model: GeneratePodcastModel, output_file: str = "output.mp3", audio_paths: dict[str, str] | None = None
+):
+    if model.response_format == "mp3" and len(model.script or []) > SEGMENT_TURNS:
+        return long_podcast_request(model, output_file, audio_paths)
+
+    audio = render_podcast(model, audio_paths)
+    if audio is not None:
         with open(output_file, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+            f.write(audio)
         print(f"✅ Audio saved to {output_file}")
-    else:
-        print(f"❌ Error: {response.status_code} - {response.text}")
+
+
+def context_instructions(instructions: str, history: list[Turn]) -> str:
+    """A speaker's instructions followed by the turns before a segment, as text context"""
+    if not history:
+        return instructions
+    header = "\n\nConversation so far (context only, do not read it aloud):\n"
+    lines = [f"{turn.speaker_id}: {turn.text}" for turn in history]
+    # Keep the most recent turns if the whole history doesn't fit the instructions limit
+    while lines and len(instructions) + len(header) + len("\n".join(lines)) > MAX_INSTRUCTIONS_LENGTH:
+        lines.pop(0)
+    return instructions + header + "\n".join(lines) if lines else instructions
+
+
+def segment_models(model: GeneratePodcastModel, segment_turns: int) -> list[GeneratePodcastModel]:
+    """
+    The script split into requests of segment_turns turns each. Every
+    segment carries the num_tts_blocks_history turns before it as text
+    context in the speakers' instructions
+    """
+    script = model.script or []
+    segments = []
+    for start in range(0, len(script), segment_turns):
+        history = script[max(0, start - model.num_tts_blocks_history):start]
+        speakers = [
+            speaker.model_copy(update={"instructions": context_instructions(speaker.instructions, history)})
+            for speaker in model.speakers
+        ]
+        segments.append(
+            model.model_copy(update={"speakers": speakers, "script": script[start:start + segment_turns]})
+        )
+    return segments
+
+
+def long_podcast_request(
+    model: GeneratePodcastModel,
+    output_file: str = "output.mp3",
+    audio_paths: dict[str, str] | None = None,
+    segment_turns: int = SEGMENT_TURNS,
+    concurrency: int = PODCAST_CONCURRENCY,
+):
+    """
+    Render a long script as segments in parallel and join them in order.
+
+    Wall-clock time is about that of the slowest segment rather than the
+    whole episode. The endpoint can't leave prior turns out of the audio it
+    returns, so the history before each segment is passed as text context
+    rather than as turns to render. MP3 segments are joined frame by frame,
+    without re-encoding.
+    """
+    if model.response_format != "mp3":
+        raise ValueError("Segmented rendering joins MP3 frames; use response_format='mp3'")
+
+    segments = segment_models(model, segment_turns)
+    print(f"Rendering {len(model.script or [])} turns as {len(segments)} segments, {concurrency} at a time")
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        parts = list(executor.map(lambda segment: render_podcast(segment, audio_paths), segments))
+
+    failed = [index + 1 for index, part in enumerate(parts) if part is None]
+    if failed:
+        print(f"❌ Error: segments {failed} failed; nothing was saved")
+        return
+
+    with open(output_file, "wb") as f:
+        f.write(concat_mp3(parts))
+    print(f"✅ Audio saved to {output_file}")
 
 
 def main():
@@ -100,13 +218,13 @@ def main():
             speakers=[
                 Speaker(
                     id="Steve",
-                    audio=file_to_base64(os.path.join(voices_dir, "steve-jobs.m4a")),
+                    audio=None,
                     voice=None,
                     instructions="",
                 ),
                 Speaker(
                     id="Grant",
-                    audio=file_to_base64(os.path.join(voices_dir, "grant.m4a")),
+                    audio=None,
                     voice=None,
                     instructions="",
                 ),
@@ -133,6 +251,10 @@ def main():
             sampling_params=DEFAULT_SAMPLING_PARAMS,
         ),
         output_file="example1_podcast.mp3",
+        audio_paths={
+            "Steve": os.path.join(voices_dir, "steve-jobs.m4a"),
+            "Grant": os.path.join(voices_dir, "grant.m4a"),
+        },
     )
 
 
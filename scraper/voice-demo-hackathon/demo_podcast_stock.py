@@ -8,6 +8,8 @@ from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 import os
 
+from audio_cache import AUDIO_CACHE, cache_key
+
 load_dotenv('/Users/advaitpaliwal/Projects/xpert/.env.local')
 
 # --- Configuration ---
@@ -58,15 +60,26 @@ class GeneratePodcastModel(BaseModel):
 def podcast_request(model: GeneratePodcastModel, output_file: str = "output.mp3"):
     payload = model.model_dump()
 
+    key = cache_key(ENDPOINT, payload)
+    cached = AUDIO_CACHE.get(key, model.response_format)
+    if cached is not None:
+        with open(output_file, "wb") as f:
+            f.write(cached)
+        print(f"♻️ Reused cached audio ({key[:12]}), saved to {output_file}")
+        return
+
     print(f"Sending request to {ENDPOINT}...")
     # print(payload) # Uncomment to debug payload
 
     response = requests.post(ENDPOINT, json=payload, stream=True, headers={"Authorization": f"Bearer {API_KEY}"})
 
     if response.status_code == 200:
+        audio = bytearray()
         with open(output_file, "wb") as f:
             for chunk in response.iter_content(chunk_size=8192):
                 f.write(chunk)
+                audio += chunk
+        AUDIO_CACHE.put(key, bytes(audio), model.response_format)
         print(f"✅ Audio saved to {output_file}")
     else:
         print(f"❌ Error: {response.status_code} - {response.text}")
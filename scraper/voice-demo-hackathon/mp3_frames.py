@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Join MP3 files at the frame level.
+
+MPEG audio frames are self-contained, so MP3s with the same sample rate and
+channel layout can be joined by concatenating their frames. Each part's
+ID3 tags and Xing/Info/VBRI header frame are dropped so that players don't
+stop at, or mis-time, the first part. No decoding or re-encoding is done.
+"""
+
+# Bitrates in kbps for MPEG-1 Layer III and MPEG-2/2.5 Layer III
+BITRATES_V1_L3 = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+BITRATES_V2_L3 = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],  # MPEG-2.5
+}
+VBR_HEADER_TAGS = (b"Xing", b"Info")
+
+
+def strip_id3(data: bytes) -> bytes:
+    """Drop a leading ID3v2 tag and a trailing ID3v1 tag"""
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        data = data[10 + size + footer:]
+    if len(data) >= 128 and data[-128:-125] == b"TAG":
+        data = data[:-128]
+    return data
+
+
+def parse_header(header: bytes) -> dict | None:
+    """Fields of a Layer III frame header, or None if these 4 bytes aren't one"""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x03
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    padding = (header[2] >> 1) & 0x01
+    mono = (header[3] >> 6) == 3
+    sample_rate = SAMPLE_RATES[version][sample_rate_index]
+    if version == 3:
+        bitrate = BITRATES_V1_L3[bitrate_index] * 1000
+        length = 144 * bitrate // sample_rate + padding
+    else:
+        bitrate = BITRATES_V2_L3[bitrate_index] * 1000
+        length = 72 * bitrate // sample_rate + padding
+    return {
+        "version": version,
+        "sample_rate": sample_rate,
+        "mono": mono,
+        "bitrate": bitrate,
+        "length": length,
+    }
+
+
+def is_vbr_header(frame: bytes, info: dict) -> bool:
+    """Xing/Info or VBRI frame: metadata describing the whole file, not audio"""
+    # Xing/Info sits right after the side info, whose size depends on version and channels
+    if info["version"] == 3:
+        offset = 4 + (17 if info["mono"] else 32)
+    else:
+        offset = 4 + (9 if info["mono"] else 17)
+    return frame[offset:offset + 4] in VBR_HEADER_TAGS or frame[36:40] == b"VBRI"
+
+
+def audio_frames(data: bytes) -> tuple[list[bytes], dict | None]:
+    """
+    The audio frames of one MP3 and the header of the first one
+    Junk before the first frame is skipped; parsing stops at anything that
+    isn't a complete frame (trailing tags, a truncated last frame)
+    """
+    data = strip_id3(data)
+    pos = 0
+    while pos + 4 <= len(data) and parse_header(data[pos:pos + 4]) is None:
+        pos += 1
+
+    frames = []
+    first = None
+    while pos + 4 <= len(data):
+        info = parse_header(data[pos:pos + 4])
+        if info is None or pos + info["length"] > len(data):
+            break
+        frame = data[pos:pos + info["length"]]
+        if not frames and is_vbr_header(frame, info):
+            pos += info["length"]
+            continue
+        frames.append(frame)
+        first = first or info
+        pos += info["length"]
+    return frames, first
+
+
+def concat_mp3(parts: list[bytes]) -> bytes:
+    """
+    One MP3 made of the audio frames of every part, in order
+    Raises ValueError if a part has no frames or its sample rate or
+    channel layout differs from the first part's
+    """
+    joined = []
+    reference = None
+    for index, data in enumerate(parts):
+        frames, info = audio_frames(data)
+        if info is None:
+            raise ValueError(f"Part {index} contains no MP3 frames")
+        if reference is None:
+            reference = info
+        elif (info["sample_rate"], info["mono"]) != (reference["sample_rate"], reference["mono"]):
+            raise ValueError(
+                f"Part {index} is {info['sample_rate']} Hz {'mono' if info['mono'] else 'stereo'}, "
+                f"expected {reference['sample_rate']} Hz {'mono' if reference['mono'] else 'stereo'}"
+            )
+        joined.extend(frames)
+    return b"".join(joined)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Registry of base64-encoded voice reference clips.
+
+Each clip is read and encoded once per version of the file, where a
+version is identified by its path, size and mtime. The encoding is kept in
+memory for the process and on disk for later runs, so batch jobs that
+reuse the same speakers skip the read and the encoding. Files on disk are
+named by clip, then version, and writing a new version of a clip deletes
+the older ones.
+"""
+
+import base64
+import hashlib
+import mmap
+import os
+import threading
+from typing import Iterator
+
+VOICE_CACHE_DIR = os.environ.get("VOICE_CACHE_DIR", "voice_cache")
+VOICE_MMAP = os.environ.get("VOICE_MMAP") == "1"  # encode clips through a memory map
+STREAM_CHUNK_BYTES = 3 * 64 * 1024  # multiple of 3, so chunks encode without padding
+
+
+def iter_base64(file_path: str, chunk_bytes: int = STREAM_CHUNK_BYTES) -> Iterator[str]:
+    """Base64 of a file in chunks, read through a memory map instead of into one buffer"""
+    with open(file_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for start in range(0, len(mapped), chunk_bytes):
+                yield base64.b64encode(mapped[start:start + chunk_bytes]).decode("ascii")
+
+
+class VoiceRegistry:
+    """Memoizes encoded reference clips in memory and under cache_dir"""
+
+    def __init__(self, cache_dir: str | None = VOICE_CACHE_DIR, use_mmap: bool = VOICE_MMAP):
+        self.cache_dir = cache_dir
+        self.use_mmap = use_mmap
+        self._encoded: dict[tuple, str] = {}
+        self._identities: dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def version(file_path: str) -> tuple:
+        stat = os.stat(file_path)
+        return os.path.realpath(file_path), stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def _disk_prefix(version: tuple) -> str:
+        """<clip digest>- : shared by every file of every version of one clip"""
+        return hashlib.sha256(version[0].encode("utf-8")).hexdigest()[:32] + "-"
+
+    def disk_path(self, version: tuple, extension: str = "b64") -> str:
+        digest = hashlib.sha256(repr(version[1:]).encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f"{self._disk_prefix(version)}{digest}.{extension}")
+
+    def _write(self, version: tuple, extension: str, text: str):
+        disk_path = self.disk_path(version, extension)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{disk_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="ascii") as file:
+            file.write(text)
+        os.replace(tmp_path, disk_path)
+        self._remove_stale(version)
+
+    def _remove_stale(self, version: tuple):
+        """Delete the files of older versions of this clip (an edited clip would otherwise add a copy per edit)"""
+        prefix = self._disk_prefix(version)
+        current = os.path.basename(self.disk_path(version, ""))
+        for name in os.listdir(self.cache_dir):
+            # Temp files belong to writers still in progress
+            if name.startswith(prefix) and not name.startswith(current) and not name.endswith(".tmp"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    pass
+
+    def identity(self, file_path: str) -> str:
+        """
+        'sha256:' + the hash of a clip's base64, as audio_cache.voice_identity
+        gives for the same clip sent inline; computed at most once per
+        version of the file, without holding the encoding
+        """
+        version = self.version(file_path)
+        with self._lock:
+            identity = self._identities.get(version)
+        if identity is not None:
+            return identity
+
+        disk_path = self.disk_path(version, "sha256") if self.cache_dir else None
+        if disk_path and os.path.exists(disk_path):
+            with open(disk_path, "r", encoding="ascii") as file:
+                identity = file.read()
+        else:
+            digest = hashlib.sha256()
+            for chunk in iter_base64(file_path):
+                digest.update(chunk.encode("ascii"))
+            identity = "sha256:" + digest.hexdigest()
+            if disk_path:
+                self._write(version, "sha256", identity)
+
+        with self._lock:
+            for stale in [v for v in self._identities if v[0] == version[0]]:
+                del self._identities[stale]
+            self._identities[version] = identity
+        return identity
+
+    def encode(self, file_path: str) -> str:
+        if self.use_mmap:
+            return "".join(iter_base64(file_path))
+        with open(file_path, "rb") as file:
+            return base64.b64encode(file.read()).decode("utf-8")
+
+    def get(self, file_path: str) -> str:
+        """Base64 of a reference clip, encoded at most once per version of the file"""
+        version = self.version(file_path)
+        with self._lock:
+            encoded = self._encoded.get(version)
+        if encoded is not None:
+            return encoded
+
+        disk_path = self.disk_path(version) if self.cache_dir else None
+        if disk_path and os.path.exists(disk_path):
+            with open(disk_path, "r", encoding="ascii") as file:
+                encoded = file.read()
+        else:
+            encoded = self.encode(file_path)
+            if disk_path:
+                self._write(version, "b64", encoded)
+
+        with self._lock:
+            # Older versions of the same clip are no longer needed in memory
+            for stale in [v for v in self._encoded if v[0] == version[0]]:
+                del self._encoded[stale]
+            self._encoded[version] = encoded
+        return encoded
+
+
+VOICES = VoiceRegistry()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Durable SQLite work queue for multi-worker runs
+Input rows are loaded once; any number of worker processes lease rows with
+a visibility timeout and write results back transactionally. Rows whose
+worker died become leasable again when the lease expires, and failed rows
+are retried with backoff until they run out of attempts. A row whose lease
+expires on its last attempt is marked failed rather than leased again, so a
+row that keeps killing its worker can't keep the queue open forever.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from rate_limiter import backoff_delay
+
+QUEUE_FILE = 'x_profiles_queue.sqlite3'
+VISIBILITY_TIMEOUT = 300.0  # seconds a lease lasts before the row is handed to another worker
+MAX_ATTEMPTS = 3  # leases per row before it is marked failed
+BUSY_TIMEOUT_MS = 30000  # wait this long for another worker's write transaction
+
+# Row states
+STATE_PENDING = 'pending'
+STATE_LEASED = 'leased'
+STATE_DONE = 'done'
+STATE_FAILED = 'failed'
+
+
+class QueueItem(NamedTuple):
+    position: int  # input order
+    name: str
+    existing_username: Optional[str]
+    attempts: int
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    One connection per worker process; every state change is a single
+    transaction, so concurrent workers never lease the same live row
+    """
+
+    def __init__(self, path: str = QUEUE_FILE, visibility_timeout: float = VISIBILITY_TIMEOUT,
+                 max_attempts: int = MAX_ATTEMPTS, owner: Optional[str] = None):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.owner = owner or worker_id()
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, isolation_level=None, timeout=BUSY_TIMEOUT_MS / 1000)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS queue (
+                position INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                existing_username TEXT,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                result TEXT,
+                last_error TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS queue_state ON queue (state, available_at)')
+
+    def _transaction(self):
+        self._conn.execute('BEGIN IMMEDIATE')
+
+    def load(self, rows: List[tuple], done: Optional[Dict[int, Dict]] = None) -> int:
+        """
+        Enqueue (position, name, existing_username) rows; rows already queued
+        are left alone. Rows whose position is in done are queued as finished
+        with that result. Rows are keyed by position, so raises ValueError
+        (queueing nothing) if the input no longer lines up with the queue,
+        e.g. a row was inserted or removed anywhere but at the end
+        """
+        done = done or {}
+        now = time.time()
+        input_names = {position: name for position, name, _ in rows}
+        self._transaction()
+        try:
+            moved = [(position, name) for position, name in self._conn.execute('SELECT position, name FROM queue')
+                     if input_names.get(position) != name]
+            if moved:
+                position, name = moved[0]
+                raise ValueError(
+                    f"{len(moved)} queued rows no longer match the input, e.g. row {position} was queued as "
+                    f"{name!r} but is now {input_names.get(position)!r}; start a new queue file for the changed input"
+                )
+            before = self._conn.total_changes
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO queue (position, name, existing_username, state, result, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(position, name, existing_username,
+                  STATE_DONE if position in done else STATE_PENDING,
+                  json.dumps(done[position], ensure_ascii=False) if position in done else None, now)
+                 for position, name, existing_username in rows]
+            )
+            added = self._conn.total_changes - before
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+        return added
+
+    def _fail_expired(self, now: float) -> int:
+        """Mark rows failed whose lease expired on their last attempt; call inside a transaction"""
+        before = self._conn.total_changes
+        self._conn.execute(
+            'UPDATE queue SET state = ?, last_error = ?, available_at = 0, lease_owner = NULL, '
+            'lease_expires = NULL, updated_at = ? WHERE state = ? AND lease_expires <= ? AND attempts >= ?',
+            (STATE_FAILED, 'lease expired', now, STATE_LEASED, now, self.max_attempts)
+        )
+        return self._conn.total_changes - before
+
+    def expire_leases(self) -> int:
+        """Fail rows whose last lease ran out; returns how many. lease() does this itself"""
+        self._transaction()
+        try:
+            expired = self._fail_expired(time.time())
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+        return expired
+
+    def lease(self, count: int = 1) -> List[QueueItem]:
+        """Lease up to count rows: pending ones whose backoff has passed, or leases that expired"""
+        now = time.time()
+        self._transaction()
+        try:
+            self._fail_expired(now)
+            rows = self._conn.execute(
+                'SELECT position, name, existing_username, attempts FROM queue '
+                'WHERE (state = ? AND available_at <= ?) OR (state = ? AND lease_expires <= ?) '
+                'ORDER BY position LIMIT ?',
+                (STATE_PENDING, now, STATE_LEASED, now, count)
+            ).fetchall()
+            self._conn.executemany(
+                'UPDATE queue SET state = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1, '
+                'updated_at = ? WHERE position = ?',
+                [(STATE_LEASED, self.owner, now + self.visibility_timeout, now, row[0]) for row in rows]
+            )
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+        return [QueueItem(position, name, existing_username, attempts + 1)
+                for position, name, existing_username, attempts in rows]
+
+    def complete(self, item: QueueItem, result: Dict):
+        """Store a finished row's result; the first one wins, even over a failure recorded after its lease expired"""
+        self._conn.execute(
+            'UPDATE queue SET state = ?, result = ?, lease_owner = NULL, lease_expires = NULL, '
+            'last_error = NULL, updated_at = ? WHERE position = ? AND state != ?',
+            (STATE_DONE, json.dumps(result, ensure_ascii=False), time.time(), item.position, STATE_DONE)
+        )
+
+    def fail(self, item: QueueItem, error: str, result: Optional[Dict] = None) -> bool:
+        """
+        Record a failed attempt: back to pending after a backoff, or failed
+        for good (keeping result as the row's output) once attempts run out
+        Returns True if the row will be retried
+        """
+        retry = item.attempts < self.max_attempts
+        now = time.time()
+        self._conn.execute(
+            'UPDATE queue SET state = ?, available_at = ?, result = ?, last_error = ?, lease_owner = NULL, '
+            'lease_expires = NULL, updated_at = ? WHERE position = ? AND state = ? AND lease_owner = ?',
+            (STATE_PENDING if retry else STATE_FAILED, now + backoff_delay(item.attempts) if retry else 0,
+             None if retry else json.dumps(result, ensure_ascii=False), error, now,
+             item.position, STATE_LEASED, self.owner)
+        )
+        return retry
+
+    def counts(self) -> Dict[str, int]:
+        counts = {state: 0 for state in [STATE_PENDING, STATE_LEASED, STATE_DONE, STATE_FAILED]}
+        for state, count in self._conn.execute('SELECT state, COUNT(*) FROM queue GROUP BY state'):
+            counts[state] = count
+        return counts
+
+    def is_finished(self) -> bool:
+        counts = self.counts()
+        return counts[STATE_PENDING] == 0 and counts[STATE_LEASED] == 0
+
+    def next_available_in(self) -> Optional[float]:
+        """Seconds until some unfinished row can be leased, or None if none are left"""
+        row = self._conn.execute(
+            'SELECT MIN(CASE WHEN state = ? THEN available_at ELSE lease_expires END) FROM queue '
+            'WHERE state IN (?, ?)',
+            (STATE_PENDING, STATE_PENDING, STATE_LEASED)
+        ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def results(self, default: Optional[Callable[[str], Dict]] = None) -> List[Dict]:
+        """
+        Results of finished (done or failed) rows, in input order
+        Failed rows without a result (their last lease expired) get
+        default(name), or are left out if there's no default
+        """
+        rows = self._conn.execute(
+            'SELECT name, result FROM queue WHERE state IN (?, ?) ORDER BY position',
+            (STATE_DONE, STATE_FAILED)
+        )
+        results = []
+        for name, result in rows:
+            if result is not None:
+                results.append(json.loads(result))
+            elif default is not None:
+                results.append(default(name))
+        return results
+
+    def failures(self) -> List[tuple]:
+        """(name, attempts, last_error) for rows that ran out of attempts"""
+        return self._conn.execute(
+            'SELECT name, attempts, last_error FROM queue WHERE state = ? ORDER BY position', (STATE_FAILED,)
+        ).fetchall()
+
+    def close(self):
+        self._conn.close()
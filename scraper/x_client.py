@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Shared X API client for the scraper scripts
+One pooled keep-alive session with OAuth 1.0a auth built once, request
+timeouts, and the header-driven rate limiter in front of every call
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests_oauthlib import OAuth1
+
+from cassette import KIND_X, Cassette, replay_x, x_key
+from metrics import METRICS
+from rate_limiter import LIMITER, RateLimiter, get_with_retries
+from response_cache import MODE_CACHE_ONLY, CachedResponse, ResponseCache
+
+X_API_BASE_URL = os.getenv('X_API_BASE_URL', 'https://api.x.com')
+
+# Path templates double as the rate limiter's endpoint keys
+X_USERS_SEARCH_PATH = '/2/users/search'
+X_USERS_TWEETS_PATH = '/2/users/{}/tweets'
+X_USERS_BY_USERNAME_PATH = '/2/users/by/username/{}'
+X_USERS_BY_USERNAMES_PATH = '/2/users/by'
+
+POOL_SIZE = int(os.getenv('X_POOL_SIZE', '16'))
+CONNECT_TIMEOUT = float(os.getenv('X_CONNECT_TIMEOUT', '5'))  # seconds
+READ_TIMEOUT = float(os.getenv('X_READ_TIMEOUT', '30'))  # seconds
+
+
+class XClient:
+    """
+    Pooled X API client
+    Safe to share between threads: requests sessions are, as long as
+    pool_size covers the number of concurrent callers
+    """
+
+    def __init__(self, consumer_key: Optional[str] = None, consumer_secret: Optional[str] = None,
+                 access_token: Optional[str] = None, access_token_secret: Optional[str] = None,
+                 pool_size: int = POOL_SIZE, connect_timeout: float = CONNECT_TIMEOUT,
+                 read_timeout: float = READ_TIMEOUT, base_url: str = X_API_BASE_URL,
+                 limiter: RateLimiter = LIMITER, cache: Optional[ResponseCache] = None,
+                 cassette: Optional[Cassette] = None):
+        self.credentials = (
+            consumer_key or os.getenv('X_CONSUMER_KEY'),
+            consumer_secret or os.getenv('X_CONSUMER_SECRET'),
+            access_token or os.getenv('X_ACCESS_TOKEN'),
+            access_token_secret or os.getenv('X_ACCESS_TOKEN_SECRET'),
+        )
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.limiter = limiter
+        self.cache = cache
+        self.cassette = cassette
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if self.has_credentials():
+            self.session.auth = OAuth1(*self.credentials)
+
+    def has_credentials(self) -> bool:
+        return all(self.credentials)
+
+    def can_request(self) -> bool:
+        """Credentials are set, or every call is served from the cache or a cassette anyway"""
+        if self.cassette is not None and self.cassette.replaying:
+            return True
+        return self.has_credentials() or (self.cache is not None and self.cache.mode == MODE_CACHE_ONLY)
+
+    def get(self, path: str, params: Optional[Dict] = None, *path_args: str) -> requests.Response:
+        """
+        GET an API path template (e.g. X_USERS_TWEETS_PATH, user_id)
+        The returned response carries .latency: wall-clock seconds for the
+        call including any rate-limit waits and retries (0 for cache hits)
+        With a cassette attached, calls are recorded to it or replayed from it
+        """
+        if self.cassette is None:
+            return self._get(path, params, *path_args)
+
+        key = x_key(path, params, *path_args)
+        if self.cassette.replaying:
+            response = replay_x(self.cassette, key)
+            METRICS.inc('x_cassette_total', endpoint=path, result='hit' if response.status_code != 504 else 'miss')
+            return response
+
+        response = self._get(path, params, *path_args)
+        # Throttling and server errors are left out so a replay doesn't reproduce them
+        if response.status_code < 500 and response.status_code != 429:
+            self.cassette.put(KIND_X, key, status=response.status_code, body=response.text)
+        return response
+
+    def _get(self, path: str, params: Optional[Dict] = None, *path_args: str) -> requests.Response:
+        url = self.base_url + path.format(*path_args)
+        cache = self.cache if self.cache is not None and self.cache.handles(path) else None
+
+        if cache is not None:
+            cached = cache.get(path, url, params)
+            METRICS.inc('x_cache_total', endpoint=path, result='hit' if cached is not None else 'miss')
+            if cached is not None:
+                return cached
+            if cache.mode == MODE_CACHE_ONLY:
+                return CachedResponse(504, f"Cache miss for {url} (cache-only mode)")
+
+        start = time.perf_counter()
+        response = get_with_retries(url, path, limiter=self.limiter, session=self.session,
+                                    params=params, timeout=self.timeout)
+        response.latency = time.perf_counter() - start
+        METRICS.observe('x_request_seconds', response.latency, endpoint=path)
+
+        if cache is not None and response.status_code == 200:
+            cache.put(path, url, params, response.status_code, response.text)
+        return response
+
+    def close(self):
+        self.session.close()
+
+
+_client: Optional[XClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> XClient:
+    """Shared client, created on first use so scripts can load their .env first"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = XClient()
+        return _client
+
+
+def configure_client(**kwargs) -> XClient:
+    """Replace the shared client, e.g. with one credential set from a pool"""
+    global _client
+    with _client_lock:
+        cache = _client.cache if _client is not None else None
+        cassette = _client.cassette if _client is not None else None
+        if _client is not None:
+            _client.close()
+        _client = XClient(**kwargs)
+        if _client.cache is None:
+            _client.cache = cache
+        if _client.cassette is None:
+            _client.cassette = cassette
+        return _client